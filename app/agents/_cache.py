@@ -0,0 +1,414 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import shelve
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+from app.models.issue import Issue
+
+
+logger = logging.getLogger(__name__)
+
+# Longest text the semantic tier embeds. Longer diffs exceed the embedding
+# model's limit, and embedding a prefix would let diffs that only differ
+# past it match each other, so they only use the exact tier.
+EMBED_MAX_CHARS = 8000
+
+# Embeddings kept per text. All agents look up the same diff text, so each
+# diff is embedded once per review instead of once per agent.
+_EMBEDDING_MEMO_SIZE = 256
+
+
+def make_cache_key(*parts: str) -> str:
+    """
+    Build a SHA-256 cache key from the given string parts.
+    
+    Parts are separated by a NUL byte so that ("ab", "c") and ("a", "bc")
+    produce different keys.
+    
+    Args:
+        *parts: Strings identifying the cached request
+    
+    Returns:
+        Hex digest of the parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    """Scale a vector to unit length so that a dot product is the cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return list(vector)
+    return [x / norm for x in vector]
+
+
+class CacheBackend(Protocol):
+    """
+    Key-value store behind the exact-match tier of ResponseCache.
+    
+    Implementations do not need to be thread-safe; ResponseCache serializes
+    access. Any store with these two methods (e.g. a Redis wrapper) can be
+    plugged in.
+    """
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under `key`, or None."""
+        ...
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key`."""
+        ...
+
+
+class MemoryBackend:
+    """In-process store that evicts the least recently used entry when full."""
+    
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize the store.
+        
+        Args:
+            max_entries: Number of entries kept before the oldest is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under `key` and mark it as recently used."""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used entry if full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ShelveBackend:
+    """File-backed store using `shelve`, so entries survive restarts."""
+    
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+        
+        Args:
+            path: File path of the shelve database
+        """
+        self._shelf = shelve.open(path)
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under `key`, or None."""
+        return self._shelf.get(key)
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key` and flush it to disk."""
+        self._shelf[key] = value
+        self._shelf.sync()
+
+
+class ResponseCache:
+    """
+    Cache of parsed agent results keyed on the prompt that produced them.
+    
+    Tiers:
+    - Exact match: SHA-256 key -> issues list, held by a CacheBackend
+      (in-memory LRU by default, or a shelve file when a path is given so
+      results survive restarts).
+    - Semantic (optional): when an embeddings client is provided, a prompt
+      whose embedding has cosine similarity >= `similarity_threshold` with a
+      previously answered prompt in the same scope reuses that answer.
+    
+    Entries older than `ttl_s` are treated as misses, so reviews pick up
+    model or prompt-side changes that the key does not capture. Expired
+    semantic entries are dropped whenever a new one is stored, and beyond
+    `max_vectors` the least recently used one is evicted, since every
+    semantic lookup scans all of them.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        embeddings: Optional[Any] = None,
+        similarity_threshold: float = 0.97,
+        backend: Optional[CacheBackend] = None,
+        ttl_s: Optional[float] = None,
+        max_vectors: int = 1024
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: File path for a persistent shelve store (if None, memory only)
+            embeddings: LangChain embeddings client used for the semantic tier
+                (if None, only exact matches are served)
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            backend: Store for exact-match entries (overrides `path`)
+            ttl_s: Seconds an entry stays valid (if None, entries never expire)
+            max_vectors: Number of semantic entries kept before the least
+                recently used is evicted
+        """
+        self._lock = threading.Lock()
+        if backend is None:
+            backend = ShelveBackend(path) if path else MemoryBackend()
+        self._backend = backend
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_s = ttl_s
+        self.max_vectors = max_vectors
+        
+        # Semantic tier entries, least recently used first:
+        # (scope, unit vector, expiry time, issues)
+        self._vectors: List[Tuple[str, List[float], Optional[float], List[Issue]]] = []
+        # Recent embeddings by text key, and embeddings being computed keyed
+        # by (id(event loop), text key) so concurrent lookups share one call
+        self._embedding_memo: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._embeddings_in_flight: Dict[Tuple[int, str], asyncio.Task] = {}
+        # Lookup outcomes of `aget`, for observability
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0}
+    
+    def get(self, key: str) -> Optional[List[Issue]]:
+        """
+        Look up an exact-match entry.
+        
+        Args:
+            key: Cache key from `make_cache_key`
+        
+        Returns:
+            Copy of the cached issues, or None on a miss
+        """
+        with self._lock:
+            entry = self._backend.get(key)
+        if not isinstance(entry, tuple):
+            # Miss, or an entry written in an older format
+            return None
+        expires_at, issues = entry
+        if expires_at is not None and expires_at < time.time():
+            return None
+        # Issues are immutable, so a new list is all callers need
+        return list(issues)
+    
+    def set(self, key: str, issues: List[Issue]) -> None:
+        """
+        Store an exact-match entry.
+        
+        Args:
+            key: Cache key from `make_cache_key`
+            issues: Parsed issues to cache
+        """
+        with self._lock:
+            self._backend.set(key, (self._expiry(), list(issues)))
+    
+    def _expiry(self) -> Optional[float]:
+        """Expiry timestamp for an entry stored now, or None without a TTL."""
+        return time.time() + self.ttl_s if self.ttl_s is not None else None
+    
+    async def _aembed(self, text: str) -> List[float]:
+        """
+        Embed a text as a unit vector, reusing recent and in-flight embeddings.
+        
+        The embedding runs in its own task, so a caller that is cancelled
+        does not cancel it for the lookups sharing it.
+        
+        Args:
+            text: Text to embed
+        
+        Returns:
+            Normalized embedding vector
+        """
+        text_key = make_cache_key(text)
+        with self._lock:
+            vector = self._embedding_memo.get(text_key)
+        if vector is not None:
+            return vector
+        
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), text_key)
+        running = self._embeddings_in_flight.get(flight_key)
+        if running is not None:
+            return await asyncio.shield(running)
+        
+        task = loop.create_task(self._aembed_uncached(text_key, text))
+        self._embeddings_in_flight[flight_key] = task
+        
+        def finish(done: asyncio.Task) -> None:
+            self._embeddings_in_flight.pop(flight_key, None)
+            # Mark the exception as retrieved in case nobody was waiting
+            if not done.cancelled():
+                done.exception()
+        
+        task.add_done_callback(finish)
+        return await asyncio.shield(task)
+    
+    async def _aembed_uncached(self, text_key: str, text: str) -> List[float]:
+        """Embed a text and remember its unit vector under `text_key`."""
+        vector = _normalize(await self.embeddings.aembed_query(text))
+        with self._lock:
+            self._embedding_memo[text_key] = vector
+            if len(self._embedding_memo) > _EMBEDDING_MEMO_SIZE:
+                self._embedding_memo.popitem(last=False)
+        return vector
+    
+    async def aget(self, key: str, scope: str, text: str) -> Optional[List[Issue]]:
+        """
+        Look up an entry, trying the exact tier first and then the semantic tier.
+        
+        Args:
+            key: Exact-match cache key
+            scope: Semantic hits are only served within the same scope
+                (e.g. same agent, model and system prompt)
+            text: Text to embed for the semantic lookup
+        
+        Returns:
+            Copy of the cached issues, or None on a miss
+        """
+        issues = self.get(key)
+        if issues is not None or self.embeddings is None or len(text) > EMBED_MAX_CHARS:
+            self._record("hits" if issues is not None else "misses")
+            return issues
+        
+        try:
+            vector = await self._aembed(text)
+        except Exception:
+            # The cache must never fail a review; treat it as a miss
+            logger.warning("Embedding lookup failed; skipping the semantic cache", exc_info=True)
+            self._record("misses")
+            return None
+        
+        best_score = -1.0
+        best_index = None
+        now = time.time()
+        with self._lock:
+            for index, (entry_scope, entry_vector, expires_at, _) in enumerate(self._vectors):
+                if entry_scope != scope or (expires_at is not None and expires_at < now):
+                    continue
+                score = sum(a * b for a, b in zip(vector, entry_vector))
+                if score > best_score:
+                    best_score = score
+                    best_index = index
+            
+            if best_index is None or best_score < self.similarity_threshold:
+                best_entry = None
+            else:
+                # Mark the entry as recently used
+                best_entry = self._vectors.pop(best_index)
+                self._vectors.append(best_entry)
+        
+        if best_entry is not None:
+            self._record("semantic_hits")
+            return list(best_entry[3])
+        self._record("misses")
+        return None
+    
+    def _record(self, outcome: str) -> None:
+        """Count a lookup outcome in `stats`."""
+        with self._lock:
+            self.stats[outcome] += 1
+    
+    async def aset(self, key: str, scope: str, text: str, issues: List[Issue]) -> None:
+        """
+        Store an entry in the exact tier and, if enabled, the semantic tier.
+        
+        Args:
+            key: Exact-match cache key
+            scope: Scope for semantic lookups
+            text: Text that was embedded (or will be) for the semantic tier
+            issues: Parsed issues to cache
+        """
+        self.set(key, issues)
+        if self.embeddings is None or len(text) > EMBED_MAX_CHARS:
+            return
+        
+        try:
+            # Usually already embedded by the lookup that missed
+            vector = await self._aembed(text)
+        except Exception:
+            logger.warning("Embedding failed; result not added to the semantic cache", exc_info=True)
+            return
+        now = time.time()
+        with self._lock:
+            if self.ttl_s is not None:
+                self._vectors = [
+                    entry for entry in self._vectors if entry[2] is None or entry[2] >= now
+                ]
+            self._vectors.append((scope, vector, self._expiry(), list(issues)))
+            if len(self._vectors) > self.max_vectors:
+                del self._vectors[:len(self._vectors) - self.max_vectors]
+
+
+# Semantic tier embedding backends and the similarity each needs for a hit.
+# Scores from different models are not comparable; MiniLM scores near
+# duplicates lower than OpenAI's larger embeddings do.
+_EMBEDDING_THRESHOLDS = {"openai": 0.97, "local": 0.87}
+
+
+def _make_embeddings(backend: str) -> Any:
+    """
+    Create the embeddings client for the semantic tier.
+    
+    Args:
+        backend: "openai" for OpenAI embeddings (needs OPENAI_API_KEY), or
+            "local" for all-MiniLM-L6-v2 run in-process (needs the optional
+            langchain-huggingface and sentence-transformers packages)
+    
+    Returns:
+        LangChain embeddings client
+    """
+    if backend == "local":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings()
+    raise ValueError(f"Unsupported embeddings backend: {backend}. Use 'openai' or 'local'")
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    Return the process-wide response cache shared by all agents.
+    
+    Configured from environment variables on first use:
+    - REVIEW_CACHE_PATH: persist exact-match entries to this shelve file
+    - REVIEW_CACHE_TTL_S: seconds before an entry expires (default: never)
+    - REVIEW_SEMANTIC_CACHE: "true" to enable the embedding-based tier
+    - REVIEW_SEMANTIC_EMBEDDINGS: "openai" (default) or "local" (MiniLM)
+    - REVIEW_SEMANTIC_THRESHOLD: minimum cosine similarity for a semantic
+      hit (default: 0.97 for openai, 0.87 for local)
+    
+    Returns:
+        Shared ResponseCache instance
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            embeddings = None
+            backend = os.getenv("REVIEW_SEMANTIC_EMBEDDINGS", "openai").lower()
+            if os.getenv("REVIEW_SEMANTIC_CACHE", "").lower() == "true":
+                embeddings = _make_embeddings(backend)
+            threshold = os.getenv("REVIEW_SEMANTIC_THRESHOLD")
+            ttl_s = os.getenv("REVIEW_CACHE_TTL_S")
+            _default_cache = ResponseCache(
+                path=os.getenv("REVIEW_CACHE_PATH") or None,
+                embeddings=embeddings,
+                similarity_threshold=(
+                    float(threshold) if threshold else _EMBEDDING_THRESHOLDS.get(backend, 0.97)
+                ),
+                ttl_s=float(ttl_s) if ttl_s else None
+            )
+        return _default_cache
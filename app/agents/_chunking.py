@@ -0,0 +1,158 @@
+import logging
+import math
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.models.diff_models import DiffResult, FileChange
+from app.agents._diff_cache import format_diff, render_diff
+
+
+logger = logging.getLogger(__name__)
+
+
+# Largest prompt (in tokens) sent for one diff before it is split per file
+DEFAULT_MAX_INPUT_TOKENS = 60_000
+
+# Diffs touching several files are reviewed file by file above this size;
+# the files are independent, so their reviews run in parallel
+PER_FILE_REVIEW_TOKENS = 20_000
+
+# Chunks per (id(diff_model), model, limits), dropped when the diff is
+# garbage collected like the formatted text. All agents split a diff into the same sub-diff objects, so
+# a fused review still makes one call per chunk.
+_CHUNK_CACHE: Dict[tuple, Optional[List[DiffResult]]] = {}
+
+
+def has_added_lines(diff_model: DiffResult) -> bool:
+    """
+    Check whether the diff adds any line.
+    
+    Diffs without added lines (pure deletions, renames) give the agents
+    no new code to review.
+    
+    Args:
+        diff_model: Parsed diff result
+    
+    Returns:
+        True if at least one change is an added line
+    """
+    return any(
+        change.type == "added"
+        for file_change in diff_model.files
+        for change in file_change.changes
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> Optional[Any]:
+    """
+    Load the tiktoken encoding for a model, once per model.
+    
+    Args:
+        model: Model name
+    
+    Returns:
+        tiktoken Encoding, or None if tiktoken or its encoding file is unavailable
+    """
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Non-OpenAI models (e.g. Claude): cl100k_base is a close estimate
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logger.warning("tiktoken encoding unavailable for %s, estimating tokens from length", model)
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens of a text for a model.
+    
+    Args:
+        text: Text to count
+        model: Model name, used to pick the tokenizer
+    
+    Returns:
+        Token count (about len(text) / 4 when tiktoken cannot be used)
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_file(file_change: FileChange, pieces: int) -> List[FileChange]:
+    """Split a file's changes into `pieces` consecutive slices of about equal size."""
+    size = math.ceil(len(file_change.changes) / pieces)
+    return [
+        FileChange(filename=file_change.filename, changes=file_change.changes[start:start + size])
+        for start in range(0, len(file_change.changes), size)
+    ]
+
+
+def _do_chunk(diff_model: DiffResult, model: str, max_tokens: int) -> List[DiffResult]:
+    """
+    Split a diff into one sub-diff per file.
+    
+    A single file larger than `max_tokens` is split further into
+    consecutive slices of its changes.
+    
+    Args:
+        diff_model: Parsed diff result
+        model: Model name, used to pick the tokenizer
+        max_tokens: Token limit per sub-diff
+    
+    Returns:
+        List of sub-diffs covering every change once, in order
+    """
+    chunks: List[DiffResult] = []
+    for file_change in diff_model.files:
+        tokens = count_tokens(render_diff(DiffResult(files=[file_change])), model)
+        if tokens > max_tokens and len(file_change.changes) > 1:
+            pieces = _split_file(file_change, math.ceil(tokens / max_tokens))
+        else:
+            pieces = [file_change]
+        chunks.extend(DiffResult(files=[piece]) for piece in pieces)
+    return chunks
+
+
+def chunk_diff(diff_model: DiffResult, model: str,
+               max_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+               per_file_tokens: int = PER_FILE_REVIEW_TOKENS) -> Optional[List[DiffResult]]:
+    """
+    Split a large diff into per-file sub-diffs that are reviewed separately.
+    
+    A multi-file diff is split once it exceeds `per_file_tokens`; a
+    single-file diff only when it exceeds `max_tokens`.
+    
+    Args:
+        diff_model: Parsed diff result
+        model: Model name, used to pick the tokenizer
+        max_tokens: Token limit for one LLM call
+        per_file_tokens: Size above which a multi-file diff is reviewed per file
+    
+    Returns:
+        Sub-diffs to review separately, or None if the diff fits (or cannot be split)
+    """
+    key = (id(diff_model), model, max_tokens, per_file_tokens)
+    if key in _CHUNK_CACHE:
+        return _CHUNK_CACHE[key]
+    
+    limit = min(per_file_tokens, max_tokens) if len(diff_model.files) > 1 else max_tokens
+    text = format_diff(diff_model)
+    # An ASCII text has at most one token per character, so short diffs
+    # skip the tokenizer entirely
+    if len(text) <= limit and text.isascii():
+        chunks = None
+    elif count_tokens(text, model) <= limit:
+        chunks = None
+    else:
+        chunks = _do_chunk(diff_model, model, max_tokens)
+        if len(chunks) < 2:
+            chunks = None
+    
+    _CHUNK_CACHE[key] = chunks
+    weakref.finalize(diff_model, _CHUNK_CACHE.pop, key, None)
+    return chunks
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import weakref
+from typing import Dict, List, Tuple
+from app.models.diff_models import Change, DiffResult
+
+
+# Diff line prefix for each change type. Change is a plain named tuple whose
+# type is not validated, so the formatter falls back to a context prefix.
+_PREFIX_MAP = {"added": "+", "removed": "-", "context": " "}
+
+# Per-file header and per-line templates; %-formatting is cheaper than
+# evaluating an f-string format spec for every line
+_FILE_HEADER = "\n=== File: %s ===\n\n"
+_LINE_TEMPLATE = "%s %4d | %s\n"
+_SKIPPED_TEMPLATE = "       ... %d lines skipped ...\n"
+
+# Unchanged lines kept around each added or removed line; longer runs of
+# context (e.g. from `git diff -U50`) are collapsed into a skip marker
+CONTEXT_LINES = 3
+
+# Formatted text per diff, keyed by id(diff_model). Entries are dropped when
+# the diff is garbage collected, so an id is never matched to a new diff.
+_FORMAT_CACHE: Dict[int, str] = {}
+
+# (formatted text, SHA-256 hex digest of it) per diff, keyed by id(diff_model)
+# and dropped with the diff like _FORMAT_CACHE
+_DIGEST_CACHE: Dict[int, Tuple[str, str]] = {}
+
+
+def _kept_ranges(changes: List[Change]) -> List[List[int]]:
+    """
+    Find the spans of changes within CONTEXT_LINES of an added or removed line.
+    
+    Only the changed lines are visited, so mostly-context files are cheap.
+
+    Args:
+        changes: Changes of one file
+
+    Returns:
+        Sorted, non-overlapping [start, end) index ranges (end may exceed len(changes))
+    """
+    ranges: List[List[int]] = []
+    for index in [i for i, change in enumerate(changes) if change.type != "context"]:
+        start = index - CONTEXT_LINES if index > CONTEXT_LINES else 0
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = index + CONTEXT_LINES + 1
+        else:
+            ranges.append([start, index + CONTEXT_LINES + 1])
+    return ranges
+
+
+def render_diff(diff_model: DiffResult) -> str:
+    """
+    Format the diff model into a readable string for the LLM, without caching.
+
+    Only the added and removed lines and CONTEXT_LINES of context around
+    them are included; the LLM is billed for every line it is sent. The
+    text is written into one StringIO buffer instead of collecting the
+    lines in a list first.
+    
+    Args:
+        diff_model: Parsed diff result
+        
+    Returns:
+        Formatted string representation of the diff
+    """
+    prefixes = _PREFIX_MAP
+    buffer = io.StringIO()
+    write = buffer.write
+    
+    for file_change in diff_model.files:
+        write(_FILE_HEADER % file_change.filename)
+        changes = file_change.changes
+        
+        position = 0
+        for start, end in _kept_ranges(changes):
+            if start > position:
+                write(_SKIPPED_TEMPLATE % (start - position))
+            for change in changes[start:end]:
+                write(_LINE_TEMPLATE % (prefixes.get(change.type, " "), change.line_number, change.content))
+            position = end
+        if position < len(changes):
+            write(_SKIPPED_TEMPLATE % (len(changes) - position))
+    
+    return buffer.getvalue()
+
+
+def format_diff(diff_model: DiffResult) -> str:
+    """
+    Format the diff for the LLM, reusing the text if this diff was already formatted.
+    
+    Every agent reviewing a diff sends the same formatted text, so the
+    first agent formats it and the others get the cached string. The diff
+    must not be modified after it has been formatted.
+    
+    Args:
+        diff_model: Parsed diff result
+        
+    Returns:
+        Formatted string representation of the diff
+    """
+    key = id(diff_model)
+    text = _FORMAT_CACHE.get(key)
+    if text is None:
+        text = render_diff(diff_model)
+        _FORMAT_CACHE[key] = text
+        weakref.finalize(diff_model, _FORMAT_CACHE.pop, key, None)
+    return text
+
+
+def diff_digest(diff_model: DiffResult, diff_text: str) -> str:
+    """
+    Hash the formatted text of a diff, reusing the digest if it was already computed.
+    
+    Every agent builds its cache key from the same formatted text, so the
+    first agent hashes it and the others get the cached digest. The digest
+    is recomputed if a different text is passed for the same diff.
+    
+    Args:
+        diff_model: Parsed diff result the text was formatted from
+        diff_text: Formatted diff text
+    
+    Returns:
+        SHA-256 hex digest of `diff_text`
+    """
+    key = id(diff_model)
+    entry = _DIGEST_CACHE.get(key)
+    if entry is not None and entry[0] is diff_text:
+        return entry[1]
+    digest = hashlib.sha256(diff_text.encode("utf-8")).hexdigest()
+    if entry is None:
+        weakref.finalize(diff_model, _DIGEST_CACHE.pop, key, None)
+    _DIGEST_CACHE[key] = (diff_text, digest)
+    return digest
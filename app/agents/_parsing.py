@@ -0,0 +1,80 @@
+import re
+from typing import Any, Dict, List
+import orjson
+from app.models.issue import Issue
+
+
+# Markdown code fence wrapping the whole response (closing fence optional).
+# Anchored at both ends so backticks inside a JSON string are left alone.
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*(?:```)?\s*$", re.DOTALL)
+
+# Fields every issue returned by the LLM must have
+_ISSUE_FIELDS = ("file", "line", "issue_type", "description", "suggestion")
+_REQUIRED_KEYS = frozenset(_ISSUE_FIELDS)
+
+
+def _is_valid_issue(issue: Any) -> bool:
+    """
+    Check that an issue has every required field with the expected type.
+    
+    Written out field by field: a missing key reads as None and fails its
+    type check, so presence and type are tested in one pass without loops.
+    """
+    return (type(issue) is dict
+            and type(issue.get("line")) is int
+            and type(issue.get("file")) is str
+            and type(issue.get("issue_type")) is str
+            and type(issue.get("description")) is str
+            and type(issue.get("suggestion")) is str)
+
+
+def _coerce_issue(issue: Dict[str, Any]) -> Issue:
+    """Build an Issue with each required field converted to its expected type."""
+    return Issue(
+        file=str(issue["file"]),
+        line=int(issue["line"]),
+        issue_type=str(issue["issue_type"]),
+        description=str(issue["description"]),
+        suggestion=str(issue["suggestion"])
+    )
+
+
+def parse_issues(response: str) -> List[Issue]:
+    """
+    Extract the JSON array of issues from a text LLM response.
+    
+    Args:
+        response: LLM response string, possibly wrapped in a markdown fence
+    
+    Returns:
+        List of issues; entries missing a required field are dropped
+    
+    Raises:
+        orjson.JSONDecodeError: If the payload is not valid JSON
+        ValueError: If a field cannot be converted to its expected type
+    """
+    # LLM might wrap JSON in a markdown code block, so strip the
+    # fence if the response is one
+    match = _FENCE_RE.match(response)
+    payload = match.group(1) if match else response
+    
+    # Parse JSON
+    issues = orjson.loads(payload)
+    
+    # Validate structure
+    if not isinstance(issues, list):
+        return []
+    
+    # Validate each issue has required fields
+    validated_issues = []
+    for issue in issues:
+        if _is_valid_issue(issue):
+            # The LLM usually returns correctly typed fields already
+            validated_issues.append(Issue(
+                issue["file"], issue["line"], issue["issue_type"],
+                issue["description"], issue["suggestion"]
+            ))
+        elif isinstance(issue, dict) and _REQUIRED_KEYS <= issue.keys():
+            validated_issues.append(_coerce_issue(issue))
+    
+    return validated_issues
@@ -1,19 +1,216 @@
+import asyncio
+import contextvars
+import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional, Any
+from contextlib import contextmanager, nullcontext
+from functools import cached_property
+from itertools import chain
+from typing import Optional, Any, AsyncContextManager, Awaitable, Callable, Dict, Iterator, List, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import SystemMessage
+from pydantic import ValidationError
+import orjson
 from app.models.diff_models import DiffResult
+from app.models.issue import Issue, IssueListSchema
+from app.agents._cache import ResponseCache, get_default_cache, make_cache_key
+from app.agents.batch_dispatcher import MIN_BATCH_LATENCY_MS, get_batch_dispatcher
+from app.agents._chunking import DEFAULT_MAX_INPUT_TOKENS, chunk_diff, has_added_lines
+from app.agents._diff_cache import diff_digest, format_diff
+from app.agents._parsing import parse_issues
+
+
+logger = logging.getLogger(__name__)
+
+# Retries of a failed LLM request (429, 5xx, timeouts, connection errors).
+# The provider SDKs back off exponentially with jitter and honor Retry-After.
+LLM_MAX_RETRIES = 3
+
+# Attempts at getting a well-formed tool call from structured output
+STRUCTURED_OUTPUT_ATTEMPTS = 2
+
+
+# LLM clients shared by every agent using the same configuration, so they
+# also share one HTTP connection pool instead of opening one per agent
+_CLIENT_CACHE: Dict[tuple, Any] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def _get_llm_client(provider: str, model: str, temperature: float, api_key: Optional[str]) -> Any:
+    """
+    Return the shared LLM client for a configuration, creating it on first use.
+    
+    Args:
+        provider: LLM provider ("openai" or "anthropic")
+        model: Model name
+        temperature: Temperature for LLM responses
+        api_key: API key for the LLM provider (if None, uses environment variable)
+    
+    Returns:
+        ChatOpenAI or ChatAnthropic client
+    """
+    key = (provider, model, temperature, api_key)
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            client_class = ChatOpenAI if provider == "openai" else ChatAnthropic
+            client = client_class(
+                model=model,
+                temperature=temperature,
+                api_key=api_key,
+                max_retries=LLM_MAX_RETRIES
+            )
+            _CLIENT_CACHE[key] = client
+    return client
+
+
+# Structured-output wrappers per LLM client, keyed by id(client). The client
+# is stored alongside so a reused id is detected.
+_STRUCTURED_CLIENTS: Dict[int, Tuple[Any, Any]] = {}
+
+
+def _get_structured_client(llm_client: Any) -> Any:
+    """
+    Return the LLM client bound to the IssueListSchema output schema.
+    
+    Args:
+        llm_client: LangChain chat model (ChatOpenAI or ChatAnthropic)
+    
+    Returns:
+        Runnable whose `ainvoke` returns an IssueListSchema
+    """
+    entry = _STRUCTURED_CLIENTS.get(id(llm_client))
+    if entry is None or entry[0] is not llm_client:
+        entry = (
+            llm_client,
+            llm_client.with_structured_output(IssueListSchema, method="function_calling")
+        )
+        _STRUCTURED_CLIENTS[id(llm_client)] = entry
+    return entry[1]
+
+
+# Direct LLM requests of one review (every agent and every chunk) in flight at once
+MAX_CHUNK_CONCURRENCY = 8
+
+# Semaphore shared by all LLM requests of the review running in this
+# context. Set by whoever fans the review out (SupervisorAgent, or an agent
+# reviewing chunks on its own); tasks started by asyncio.gather inherit it.
+_REQUEST_SLOTS: contextvars.ContextVar[Optional[asyncio.Semaphore]] = contextvars.ContextVar(
+    "review_request_slots", default=None
+)
+
+
+@contextmanager
+def limit_review_requests(limit: int = MAX_CHUNK_CONCURRENCY) -> Iterator[None]:
+    """
+    Cap the direct LLM requests of the review run inside this block.
+    
+    Every (agent, chunk) request started in the block, including tasks
+    created by asyncio.gather, waits for one of `limit` slots, like the
+    `max_concurrency` option of a LangChain batch call.
+    
+    Args:
+        limit: Maximum number of requests in flight at once
+    """
+    token = _REQUEST_SLOTS.set(asyncio.Semaphore(limit))
+    try:
+        yield
+    finally:
+        _REQUEST_SLOTS.reset(token)
+
+
+def review_request_slot() -> AsyncContextManager:
+    """
+    Hold one of the current review's request slots while the block runs.
+
+    Outside `limit_review_requests` there is no limit and the block runs
+    right away.
+
+    Returns:
+        Async context manager for one LLM request
+    """
+    return _REQUEST_SLOTS.get() or nullcontext()
+
+
+# LLM requests currently running, keyed by (id(event loop), cache key).
+# Later callers with the same prompt await the running request instead of
+# starting their own.
+_IN_FLIGHT: Dict[Tuple[int, str], asyncio.Task] = {}
+
+# Stands in for the diff when a prompt template is hashed into a cache key
+_DIFF_PLACEHOLDER = "\x00diff\x00"
+
+
+def cacheable_system_message(system_prompt: str) -> SystemMessage:
+    """
+    Build a system message marked as an Anthropic prompt-cache breakpoint.
+    
+    The static system prompt is sent as a content block with
+    `cache_control: ephemeral`. Agents define their prompts and build both
+    system messages once at module level, so every call sends the same
+    prefix, which provider-side caching requires. OpenAI caches identical
+    prefixes automatically and needs no marker.
+
+    The marker only takes effect once the cached prefix reaches the
+    provider's minimum length (1024 tokens for most Claude models, 2048 for
+    Haiku; OpenAI also needs 1024). The agents' system prompts are currently
+    shorter, so they are re-processed on every call until they grow past it.
+    
+    Args:
+        system_prompt: Static system prompt text
+    
+    Returns:
+        SystemMessage with a single cacheable text block
+    """
+    return SystemMessage(content=[{
+        "type": "text",
+        "text": system_prompt,
+        "cache_control": {"type": "ephemeral"}
+    }])
+
+
+async def ainvoke_structured(structured_client: Any, messages: List, caller: str) -> Any:
+    """
+    Invoke a structured-output client, asking again if the tool call is missing or malformed.
+    
+    Transient HTTP errors are already retried by the client; this covers
+    responses that arrive but carry no valid tool call.
+    
+    Args:
+        structured_client: Result of `with_structured_output`
+        messages: Messages to send
+        caller: Name used in log messages
+    
+    Returns:
+        Parsed structured output
+    
+    Raises:
+        OutputParserException: If no attempt returned a valid tool call
+    """
+    for attempt in range(1, STRUCTURED_OUTPUT_ATTEMPTS + 1):
+        try:
+            result = await structured_client.ainvoke(messages)
+        except (OutputParserException, ValidationError) as e:
+            result, error = None, e
+        else:
+            error = "response contained no tool call"
+        if result is not None:
+            return result
+        logger.warning("%s got malformed structured output (attempt %d of %d): %s",
+                       caller, attempt, STRUCTURED_OUTPUT_ATTEMPTS, error)
+    raise OutputParserException(
+        f"No valid structured output after {STRUCTURED_OUTPUT_ATTEMPTS} attempts"
+    )
 
 
 class BaseReviewAgent(ABC):
     """
     Base class for all review agents in the multi-agent framework.
     
-    Each agent specializes in a specific aspect of code review:
-    - Logic review
-    - Security review
-    - Performance review
-    - Readability review
+    Holds the LLM configuration shared by the supervisor and the
+    specialized agents; the review flow itself is in SpecializedReviewAgent.
     """
     
     def __init__(
@@ -23,7 +220,8 @@ class BaseReviewAgent(ABC):
         llm_provider: str = "openai",
         model_name: Optional[str] = None,
         temperature: float = 0.0,
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        llm_client: Optional[Any] = None
     ):
         """
         Initialize the base review agent.
@@ -35,6 +233,8 @@ class BaseReviewAgent(ABC):
             model_name: Specific model name (e.g., "gpt-4", "claude-3-opus")
             temperature: Temperature for LLM responses
             api_key: API key for the LLM provider (if None, uses environment variable)
+            llm_client: Chat model to use instead of the shared client for
+                this configuration (e.g. the supervisor's client)
         """
         self.name = name
         self.description = description
@@ -45,32 +245,471 @@ class BaseReviewAgent(ABC):
             # Use gpt-3.5-turbo as default (more accessible than gpt-4)
             # Users can override with LLM_MODEL_NAME env var (e.g., gpt-4o, gpt-4-turbo)
             model = model_name or "gpt-3.5-turbo"
-            self.llm_client = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                api_key=api_key
-            )
         elif self.llm_provider == "anthropic":
             model = model_name or "claude-3-opus-20240229"
-            self.llm_client = ChatAnthropic(
-                model=model,
-                temperature=temperature,
-                api_key=api_key
-            )
         else:
             raise ValueError(f"Unsupported LLM provider: {llm_provider}. Use 'openai' or 'anthropic'")
+        
+        if llm_client is None:
+            llm_client = _get_llm_client(self.llm_provider, model, temperature, api_key)
+        self.llm_client = llm_client
+        self.model_name = model
+        self.temperature = temperature
     
-    @abstractmethod
     def analyze(self, diff_model: DiffResult) -> Any:
         """
         Analyze the diff and provide review feedback.
         
+        Runs `aanalyze` on a new event loop, for callers without one.
+        
         Args:
             diff_model: Parsed diff result containing file changes
-            
+        
+        Returns:
+            Review results (same structure as `aanalyze`)
+        """
+        return asyncio.run(self.aanalyze(diff_model))
+    
+    @abstractmethod
+    async def aanalyze(self, diff_model: DiffResult) -> Any:
+        """
+        Asynchronously analyze the diff and provide review feedback.
+        
+        Args:
+            diff_model: Parsed diff result containing file changes
+        
         Returns:
-            Review results (structure to be defined by subclasses).
-            Can be a dict, list, or other structure depending on the agent.
+            Review results (structure to be defined by subclasses)
         """
         pass
 
+
+class SpecializedReviewAgent(BaseReviewAgent):
+    """
+    Base class for the agents that review one aspect of a diff.
+    
+    Each agent specializes in a specific aspect of code review:
+    - Logic review
+    - Security review
+    - Performance review
+    - Readability review
+    
+    Subclasses provide the prompt (`_create_review_prompt`); chunking,
+    caching, fused review and the LLM call are shared.
+    """
+    
+    # Key of this agent's slice in a fused review (see FusedReviewer)
+    review_aspect: Optional[str] = None
+    
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        llm_provider: str = "openai",
+        model_name: Optional[str] = None,
+        temperature: float = 0.0,
+        api_key: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        latency_budget_ms: Optional[int] = None,
+        max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+        llm_client: Optional[Any] = None
+    ):
+        """
+        Initialize the specialized review agent.
+        
+        Args:
+            name: Name of the agent
+            description: Description of what the agent does
+            llm_provider: LLM provider to use ("openai" or "anthropic")
+            model_name: Specific model name (e.g., "gpt-4", "claude-3-opus")
+            temperature: Temperature for LLM responses
+            api_key: API key for the LLM provider (if None, uses environment variable)
+            cache: Response cache to use (if None, uses the shared default cache).
+                Only consulted at temperature 0, where responses are repeatable
+            latency_budget_ms: How long a review may take. Budgets of 10s or more
+                route LLM calls through the provider batch API at half the cost
+                (if None, calls are always made directly)
+            max_input_tokens: Diffs larger than this are split into file-sized
+                chunks that are reviewed in parallel (multi-file diffs are
+                already split above PER_FILE_REVIEW_TOKENS)
+            llm_client: Chat model to use instead of the shared client for
+                this configuration (e.g. the supervisor's client)
+        """
+        super().__init__(
+            name=name,
+            description=description,
+            llm_provider=llm_provider,
+            model_name=model_name,
+            temperature=temperature,
+            api_key=api_key,
+            llm_client=llm_client
+        )
+        self._cache = cache if cache is not None else get_default_cache()
+        
+        # When set, the agent takes its issues from a shared single-call review
+        self.fused_reviewer = None
+        
+        self.max_input_tokens = max_input_tokens
+        self.latency_budget_ms = latency_budget_ms
+        self.batch_dispatcher = None
+        if latency_budget_ms is not None:
+            self.batch_dispatcher = get_batch_dispatcher(
+                self.llm_client, self.llm_provider, self.model_name, temperature, api_key
+            )
+    
+    def _select_system_message(self, plain: SystemMessage, cacheable: SystemMessage) -> SystemMessage:
+        """
+        Pick the system message variant for this agent's provider.
+        
+        Args:
+            plain: System message with plain string content
+            cacheable: Same prompt built with `cacheable_system_message`
+        
+        Returns:
+            `cacheable` for Anthropic, `plain` otherwise
+        """
+        return cacheable if self.llm_provider == "anthropic" else plain
+    
+    def _select_files(self, diff_model: DiffResult) -> Optional[DiffResult]:
+        """
+        Restrict the diff to the files this agent reviews.
+        
+        Agents override this to skip files they have nothing to say about.
+        The fused review covers every aspect, so it always gets the full diff.
+        
+        Args:
+            diff_model: Parsed diff result
+        
+        Returns:
+            The diff to review (`diff_model` itself if every file is kept),
+            or None if no file with added lines is left
+        """
+        return diff_model
+    
+    def _format_diff_for_llm(self, diff_model: DiffResult) -> str:
+        """
+        Format the diff model into a readable string for the LLM.
+        
+        Every agent sends the same text, so the diff is formatted once and
+        the string is shared by all agents reviewing it (see `format_diff`).
+        
+        Args:
+            diff_model: Parsed diff result
+        
+        Returns:
+            Formatted string representation of the diff
+        """
+        return format_diff(diff_model)
+    
+    def _uses_batch_api(self) -> bool:
+        """Whether the latency budget lets requests go through the provider batch API."""
+        return self.batch_dispatcher is not None and self.latency_budget_ms >= MIN_BATCH_LATENCY_MS
+    
+    async def _ainvoke_structured(self, messages: List) -> List[Issue]:
+        """
+        Send messages to the LLM and return the issues as structured output.
+        
+        The model answers with a tool call matching IssueListSchema, so the
+        response is always valid JSON without markdown fences to strip. A
+        missing or malformed tool call is asked for again before giving up;
+        transient HTTP errors are already retried by the client.
+        
+        Args:
+            messages: Messages to send
+        
+        Returns:
+            List of issues
+        
+        Raises:
+            OutputParserException: If no attempt returned a valid tool call
+        """
+        structured_client = _get_structured_client(self.llm_client)
+        result = await ainvoke_structured(structured_client, messages, self.name)
+        return [
+            Issue(issue.file, issue.line, issue.issue_type, issue.description, issue.suggestion)
+            for issue in result.issues
+        ]
+    
+    async def _ainvoke_text(self, messages: List) -> str:
+        """
+        Send messages through the provider batch API and return the response text.
+        
+        Only used when the latency budget allows slow-but-cheap batch
+        processing; direct calls go through `_ainvoke_structured`.
+        
+        Args:
+            messages: Messages to send
+        
+        Returns:
+            Response text of the LLM
+        """
+        return await self.batch_dispatcher.submit(messages)
+    
+    async def _single_flight(
+        self,
+        key: str,
+        fetch: Callable[..., Awaitable[List[Issue]]],
+        *args: Any
+    ) -> List[Issue]:
+        """
+        Run `fetch(*args)` unless a request with the same key is already running.
+        
+        The response cache only helps once a result is stored. Requests for
+        the same prompt that start concurrently (e.g. two webhook deliveries
+        for one pull request) would all miss it, so the first caller makes
+        the LLM call and the others await its result. The call runs in its
+        own task, so a caller that is cancelled (e.g. a stream client that
+        disconnected) does not cancel it for the others.
+        
+        Args:
+            key: Cache key identifying the request
+            fetch: Coroutine function producing the issues
+            *args: Arguments for `fetch`
+            
+        Returns:
+            Issues produced by `fetch` (a new list for callers that waited)
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        running = _IN_FLIGHT.get(flight_key)
+        if running is not None:
+            # Issues are immutable; only the list itself needs copying
+            return list(await asyncio.shield(running))
+        
+        task = loop.create_task(fetch(*args))
+        _IN_FLIGHT[flight_key] = task
+        
+        def finish(done: asyncio.Task) -> None:
+            _IN_FLIGHT.pop(flight_key, None)
+            # Mark the exception as retrieved in case nobody was waiting
+            if not done.cancelled():
+                done.exception()
+        
+        task.add_done_callback(finish)
+        return await asyncio.shield(task)
+    
+    @cached_property
+    def _template_key(self) -> str:
+        """Hash of agent name, model and prompt template (the prompt built around a placeholder)."""
+        template = self._create_review_prompt(_DIFF_PLACEHOLDER)
+        return make_cache_key(self.name, self.model_name, *(str(m.content) for m in template))
+
+    def _cache_key(self, diff_model: DiffResult, diff_text: str) -> str:
+        """
+        Build the exact-match cache key for this agent's review of a diff.
+        
+        The prompt is identified by its template, hashed once per agent, and
+        the digest of the diff text. The digest is shared by all agents
+        reviewing the diff, so the full diff is hashed once per review
+        instead of once per agent.
+        
+        Args:
+            diff_model: Parsed diff result being reviewed
+            diff_text: Formatted diff the prompt is built from
+        
+        Returns:
+            SHA-256 key over the template key and diff digest
+        """
+        return make_cache_key(self._template_key, diff_digest(diff_model, diff_text))
+    
+    def _cache_scope(self, messages: List) -> str:
+        """Scope for semantic cache hits: same agent, model and system prompt."""
+        return make_cache_key(self.name, self.model_name, str(messages[0].content))
+    
+    async def _aget_cached(self, cache_key: str, messages: List, diff_text: str) -> Optional[List[Issue]]:
+        """
+        Look up previously parsed issues for this prompt.
+        
+        Args:
+            cache_key: Key from `_cache_key`
+            messages: Messages that would be sent to the LLM
+            diff_text: Formatted diff, embedded for semantic lookups (the same
+                text for every agent, so it is embedded once per review)
+        
+        Returns:
+            Cached issues, or None if the LLM has to be called
+        """
+        if self.temperature != 0:
+            return None
+        return await self._cache.aget(cache_key, self._cache_scope(messages), diff_text)
+    
+    async def _aset_cached(self, cache_key: str, messages: List, diff_text: str,
+                           issues: List[Issue]) -> None:
+        """
+        Store parsed issues for this prompt.
+        
+        Args:
+            cache_key: Key from `_cache_key`
+            messages: Messages that were sent to the LLM
+            diff_text: Formatted diff the messages were built from
+            issues: Parsed issues returned for them
+        """
+        if self.temperature != 0:
+            return
+        await self._cache.aset(cache_key, self._cache_scope(messages), diff_text, issues)
+    
+    @abstractmethod
+    def _create_review_prompt(self, diff_text: str) -> List:
+        """
+        Create the messages asking the LLM to review the formatted diff.
+        
+        Specialized agents implement this with their own system prompt;
+        everything else in the review flow is shared.
+        
+        Args:
+            diff_text: Formatted diff string
+        
+        Returns:
+            List of messages for the LLM
+        """
+        pass
+    
+    def _parse_llm_response(self, response: str) -> List[Issue]:
+        """
+        Parse a text LLM response and extract the JSON array of issues.
+        
+        Only batch API responses are parsed this way; direct calls return
+        structured output.
+        
+        Args:
+            response: LLM response string
+        
+        Returns:
+            List of issues (empty if the response could not be parsed)
+        """
+        try:
+            return parse_issues(response)
+        except (orjson.JSONDecodeError, KeyError, ValueError, TypeError) as e:
+            # Log parsing errors; the response is truncated lazily by %.500s
+            logger.warning("%s failed to parse LLM response: %s. Response was: %.500s",
+                           self.name, e, response)
+            return []
+    
+    async def aanalyze(self, diff_model: DiffResult) -> List[Issue]:
+        """
+        Asynchronously analyze the diff and return the issues for this agent's aspect.
+        
+        Uses the non-blocking LLM API so that several agents can wait on the
+        LLM concurrently. Oversize diffs are reviewed per chunk, a shared
+        fused review is used when configured, and cached or in-flight results
+        for the same prompt are reused before the LLM is called.
+        
+        Args:
+            diff_model: Parsed diff result containing file changes
+        
+        Returns:
+            List of Issue objects
+        """
+        # If no files changed or nothing was added, there is nothing to review
+        if not diff_model.files or not has_added_lines(diff_model):
+            return []
+        
+        # Oversize diffs are reviewed per chunk, each chunk by this method
+        chunks = chunk_diff(diff_model, self.model_name, self.max_input_tokens)
+        if chunks is not None:
+            return await self._aanalyze_chunks(chunks)
+        
+        if self.fused_reviewer is not None:
+            return await self._aanalyze_fused(diff_model)
+        
+        # Skip the LLM call if none of the files concern this agent
+        diff_model = self._select_files(diff_model)
+        if diff_model is None:
+            return []
+        
+        # Format diff and create prompt
+        diff_text = self._format_diff_for_llm(diff_model)
+        messages = self._create_review_prompt(diff_text)
+        
+        # Reuse the result of an identical (or near-identical) earlier review
+        cache_key = self._cache_key(diff_model, diff_text)
+        cached_issues = await self._aget_cached(cache_key, messages, diff_text)
+        if cached_issues is not None:
+            return cached_issues
+        
+        # Call LLM; concurrent reviews of the same prompt share one call
+        try:
+            return await self._single_flight(cache_key, self._afetch_issues, cache_key, messages, diff_text)
+        except Exception:
+            # Log the error with its traceback
+            logger.exception("%s LLM call failed", self.name)
+            # Return empty list on failure
+            return []
+    
+    async def _afetch_issues(self, cache_key: str, messages: List, diff_text: str) -> List[Issue]:
+        """
+        Call the LLM, parse its response and cache the parsed issues.
+        
+        Direct calls use structured output. Batch API requests carry no
+        tool schema, so their text response is parsed instead.
+        
+        Args:
+            cache_key: Key from `_cache_key`
+            messages: Messages to send
+            diff_text: Formatted diff the messages were built from
+        
+        Returns:
+            List of issues
+        """
+        if self._uses_batch_api():
+            response_text = await self._ainvoke_text(messages)
+            
+            # Skip building the preview entirely unless debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s raw LLM response length: %d, first 200 chars: %s",
+                             self.name, len(response_text), response_text[:200])
+            
+            # Parse response
+            issues = self._parse_llm_response(response_text)
+        else:
+            # Batch requests wait on the provider, not on us, so only direct
+            # calls take one of the review's request slots
+            async with review_request_slot():
+                issues = await self._ainvoke_structured(messages)
+        
+        logger.debug("%s parsed %d issues", self.name, len(issues))
+        
+        await self._aset_cached(cache_key, messages, diff_text, issues)
+        
+        return issues
+    
+    async def _aanalyze_chunks(self, chunks: List[DiffResult]) -> List[Issue]:
+        """
+        Review the chunks of a large diff concurrently and merge the issues.
+        
+        The chunk requests share the review's request slots with the other
+        agents, so at most MAX_CHUNK_CONCURRENCY requests are in flight at
+        once and a PR touching hundreds of files does not open hundreds of
+        requests. An agent used on its own gets its own slots.
+        
+        Args:
+            chunks: Sub-diffs from `chunk_diff`
+        
+        Returns:
+            Issues of all chunks, in chunk order
+        """
+        slots = limit_review_requests() if _REQUEST_SLOTS.get() is None else nullcontext()
+        with slots:
+            results = await asyncio.gather(*(self.aanalyze(chunk) for chunk in chunks))
+        return list(chain.from_iterable(results))
+    
+    async def _aanalyze_fused(self, diff_model: DiffResult) -> List[Issue]:
+        """
+        Take this agent's issues from the shared fused review of the diff.
+        
+        Args:
+            diff_model: Parsed diff result
+        
+        Returns:
+            List of issues for this agent's review aspect
+        """
+        if not diff_model.files:
+            return []
+        try:
+            results = await self.fused_reviewer.areview(diff_model, self._format_diff_for_llm(diff_model))
+        except Exception:
+            # Every agent sharing the fused review logs its own failure,
+            # as a failed direct call would
+            logger.exception("%s fused review failed", self.name)
+            return []
+        return list(results[self.review_aspect])
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
+
+
+logger = logging.getLogger(__name__)
+
+# Agents whose latency budget is below this call the chat model directly
+MIN_BATCH_LATENCY_MS = 10_000
+
+# Message types of LangChain messages mapped to provider roles
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def _message_text(content: Any) -> str:
+    """Flatten LangChain message content (string or content blocks) to text."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+class BatchDispatcher:
+    """
+    Sends LLM requests through the provider's asynchronous batch API.
+    
+    Batch APIs (Anthropic Message Batches, OpenAI Batch) bill at half the
+    normal price but only guarantee completion within 24 hours. Requests
+    are pooled for up to `window_ms` (or until `max_size` requests are
+    queued), submitted as one batch job, and each caller's future is
+    resolved when the job finishes. Agents only submit requests here when
+    their latency budget allows it; otherwise they call the chat model
+    directly.
+    
+    The dispatcher must be used from a single event loop.
+    """
+    
+    def __init__(
+        self,
+        llm_client: Any,
+        provider: str,
+        model: str,
+        temperature: float = 0.0,
+        api_key: Optional[str] = None,
+        window_ms: int = 30_000,
+        max_size: int = 100,
+        poll_interval_s: float = 30.0
+    ):
+        """
+        Initialize the dispatcher.
+        
+        Args:
+            llm_client: LangChain chat model whose max_tokens batch requests use
+            provider: LLM provider ("openai" or "anthropic")
+            model: Model name used for batch requests
+            temperature: Temperature for batch requests
+            api_key: API key for the provider (if None, uses environment variable)
+            window_ms: How long to pool requests before submitting a batch
+            max_size: Submit immediately once this many requests are queued
+            poll_interval_s: Seconds between batch status checks
+        """
+        self.llm_client = llm_client
+        self.provider = provider
+        self.model = model
+        self.temperature = temperature
+        self.api_key = api_key
+        self.window_ms = window_ms
+        self.max_size = max_size
+        self.poll_interval_s = poll_interval_s
+        
+        self._queue: List[Tuple[List, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Keep references to running batch jobs so they are not garbage collected
+        self._jobs: set = set()
+    
+    async def submit(self, messages: List) -> str:
+        """
+        Queue messages for the next batch job and return the response text.
+        
+        Args:
+            messages: LangChain messages for one request
+        
+        Returns:
+            Response text of the LLM
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((messages, future))
+        
+        if len(self._queue) >= self.max_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_ms / 1000, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Submit all queued requests as one batch job."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        pending, self._queue = self._queue, []
+        if not pending:
+            return
+        
+        job = asyncio.ensure_future(self._run_batch(pending))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+    
+    async def _run_batch(self, pending: List[Tuple[List, asyncio.Future]]) -> None:
+        """
+        Run one batch job and resolve the futures of its requests.
+        
+        Args:
+            pending: Queued (messages, future) pairs; the list index is the custom_id
+        """
+        requests = [(str(index), messages) for index, (messages, _) in enumerate(pending)]
+        try:
+            if self.provider == "anthropic":
+                results = await self._run_anthropic_batch(requests)
+            else:
+                results = await self._run_openai_batch(requests)
+        except Exception as e:
+            logger.exception("Batch of %d requests failed", len(pending))
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for index, (_, future) in enumerate(pending):
+            custom_id = str(index)
+            if future.done():
+                continue
+            if custom_id in results:
+                future.set_result(results[custom_id])
+            else:
+                future.set_exception(RuntimeError(f"Batch request {custom_id} did not succeed"))
+    
+    async def _run_anthropic_batch(self, requests: List[Tuple[str, List]]) -> Dict[str, str]:
+        """
+        Submit requests through the Anthropic Message Batches API.
+        
+        Args:
+            requests: (custom_id, messages) pairs
+        
+        Returns:
+            Dictionary mapping custom_id to response text for succeeded requests
+        """
+        import anthropic
+        
+        client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        max_tokens = getattr(self.llm_client, "max_tokens", None) or 4096
+        
+        batch_requests = []
+        for custom_id, messages in requests:
+            params: Dict[str, Any] = {
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "temperature": self.temperature,
+                "messages": [
+                    {"role": _ROLES[m.type], "content": m.content}
+                    for m in messages if m.type != "system"
+                ]
+            }
+            system = [m.content for m in messages if m.type == "system"]
+            if system:
+                params["system"] = system[0]
+            batch_requests.append({"custom_id": custom_id, "params": params})
+        
+        batch = await client.messages.batches.create(requests=batch_requests)
+        while batch.processing_status != "ended":
+            await asyncio.sleep(self.poll_interval_s)
+            batch = await client.messages.batches.retrieve(batch.id)
+        
+        results = {}
+        async for entry in await client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = "".join(
+                    block.text for block in entry.result.message.content if block.type == "text"
+                )
+        return results
+    
+    async def _run_openai_batch(self, requests: List[Tuple[str, List]]) -> Dict[str, str]:
+        """
+        Submit requests through the OpenAI Batch API.
+        
+        Args:
+            requests: (custom_id, messages) pairs
+        
+        Returns:
+            Dictionary mapping custom_id to response text for succeeded requests
+        """
+        import openai
+        
+        client = openai.AsyncOpenAI(api_key=self.api_key)
+        
+        lines = [
+            orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "temperature": self.temperature,
+                    "messages": [
+                        {"role": _ROLES[m.type], "content": _message_text(m.content)}
+                        for m in messages
+                    ]
+                }
+            })
+            for custom_id, messages in requests
+        ]
+        input_file = await client.files.create(file=("batch.jsonl", b"\n".join(lines)), purpose="batch")
+        
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(self.poll_interval_s)
+            batch = await client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+        
+        output = await client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+
+
+# One dispatcher per LLM configuration, so requests from every agent and
+# every review share the same batching window
+_DISPATCHERS: Dict[tuple, BatchDispatcher] = {}
+_DISPATCHERS_LOCK = threading.Lock()
+
+
+def get_batch_dispatcher(
+    llm_client: Any,
+    provider: str,
+    model: str,
+    temperature: float,
+    api_key: Optional[str]
+) -> BatchDispatcher:
+    """
+    Return the shared dispatcher for an LLM configuration, creating it on first use.
+    
+    Args:
+        llm_client: LangChain chat model whose max_tokens batch requests use
+        provider: LLM provider ("openai" or "anthropic")
+        model: Model name
+        temperature: Temperature for LLM responses
+        api_key: API key for the provider (if None, uses environment variable)
+    
+    Returns:
+        Shared BatchDispatcher instance
+    """
+    key = (provider, model, temperature, api_key)
+    with _DISPATCHERS_LOCK:
+        dispatcher = _DISPATCHERS.get(key)
+        if dispatcher is None:
+            dispatcher = BatchDispatcher(
+                llm_client,
+                provider=provider,
+                model=model,
+                temperature=temperature,
+                api_key=api_key
+            )
+            _DISPATCHERS[key] = dispatcher
+    return dispatcher
@@ -0,0 +1,130 @@
+import asyncio
+import weakref
+from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from app.models.diff_models import DiffResult
+from app.models.issue import Issue, IssueSchema
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.agents.base_agent import ainvoke_structured, review_request_slot
+
+
+# Review aspects covered by the fused call, one per specialized agent
+REVIEW_ASPECTS = ("logic", "performance", "security", "readability")
+
+_SYSTEM_PROMPT = """You are an expert code reviewer. Review the provided code diff for four independent aspects and report the issues for each aspect separately.
+
+1. logic - Correctness issues:
+   - Incorrect conditions (wrong boolean logic, incorrect comparisons)
+   - Missing edge cases (null checks, boundary conditions, empty collections)
+   - Wrong data flow (incorrect variable usage, wrong function calls)
+   - Potential runtime errors (null dereferences, index out of bounds, type errors)
+   Issue types: "logic_error", "missing_edge_case", "data_flow_error", "runtime_error"
+
+2. performance - Performance issues:
+   - O(n^2) loops
+   - Redundant computations
+   - Heavy operations (database queries, file I/O, API calls) inside loops
+   - Inefficient data structures
+   Issue types: "o_n_squared_loop", "redundant_computation", "heavy_operation_in_loop", "inefficient_data_structure"
+
+3. security - Security vulnerabilities:
+   - SQL injection risk
+   - Command injection
+   - Unsafe eval/exec
+   - Sensitive data exposure
+   - Hardcoded credentials
+   Issue types: "sql_injection", "command_injection", "unsafe_eval", "sensitive_data_exposure", "hardcoded_credentials"
+
+4. readability - Readability and maintainability issues:
+   - Bad variable names
+   - Missing comments
+   - Long functions
+   - Magic numbers
+   - Repeated code
+   Issue types: "bad_variable_name", "missing_comment", "long_function", "magic_number", "repeated_code"
+
+For each issue provide the file name, the line number, the issue type, a clear description of the problem and a concrete suggestion for how to fix it. Report each issue under exactly one aspect. Use an empty list for an aspect with no issues."""
+
+# Built once and shared by every fused review
+_SYSTEM_MESSAGE = SystemMessage(content=_SYSTEM_PROMPT)
+
+
+class FusedReviewSchema(BaseModel):
+    """Structured output of a fused review: one issue list per aspect."""
+    logic: List[IssueSchema] = Field(default_factory=list, description="Logic and correctness issues")
+    performance: List[IssueSchema] = Field(default_factory=list, description="Performance issues")
+    security: List[IssueSchema] = Field(default_factory=list, description="Security vulnerabilities")
+    readability: List[IssueSchema] = Field(default_factory=list, description="Readability issues")
+
+
+class FusedReviewer:
+    """
+    Reviews a diff for all aspects in a single LLM call.
+    
+    The specialized agents each send the same diff to the LLM. When fused
+    review is enabled they instead ask a shared FusedReviewer, which makes
+    one structured-output call per diff and hands each agent its slice. The
+    diff is sent (and billed) once instead of once per agent.
+    """
+    
+    def __init__(self, llm_client: Any):
+        """
+        Initialize the fused reviewer.
+        
+        Args:
+            llm_client: LangChain chat model (ChatOpenAI or ChatAnthropic)
+        """
+        self.llm_client = llm_client
+        self._structured_client = llm_client.with_structured_output(
+            FusedReviewSchema,
+            method="function_calling"
+        )
+        # In-flight or finished review per diff, keyed by id(diff_model) so
+        # that concurrently running agents share one LLM call
+        self._reviews: Dict[int, asyncio.Future] = {}
+    
+    async def areview(self, diff_model: DiffResult, diff_text: str) -> Dict[str, List[Issue]]:
+        """
+        Review a diff for all aspects, calling the LLM at most once per diff.
+        
+        Args:
+            diff_model: Parsed diff result (identifies the review)
+            diff_text: Diff formatted for the LLM
+        
+        Returns:
+            Dictionary mapping each aspect in REVIEW_ASPECTS to its issue list
+        """
+        key = id(diff_model)
+        review = self._reviews.get(key)
+        if review is None:
+            review = asyncio.ensure_future(self._run_review(diff_text))
+            self._reviews[key] = review
+            # Drop the entry once the diff is gone so its id can be reused
+            weakref.finalize(diff_model, self._reviews.pop, key, None)
+        return await review
+    
+    async def _run_review(self, diff_text: str) -> Dict[str, List[Issue]]:
+        """
+        Make the fused LLM call.
+        
+        Args:
+            diff_text: Diff formatted for the LLM
+        
+        Returns:
+            Dictionary mapping each aspect to its issue list
+        """
+        messages = [
+            _SYSTEM_MESSAGE,
+            HumanMessage(content=f"Please review the following code changes:\n\n{diff_text}")
+        ]
+        # Like a direct agent call, the fused call takes one of the review's
+        # request slots, so chunked fused reviews stay within the limit
+        async with review_request_slot():
+            result = await ainvoke_structured(self._structured_client, messages, "Fused review")
+        return {
+            aspect: [
+                Issue(issue.file, issue.line, issue.issue_type, issue.description, issue.suggestion)
+                for issue in getattr(result, aspect)
+            ]
+            for aspect in REVIEW_ASPECTS
+        }
@@ -1,72 +1,19 @@
-import json
-from typing import List, Dict, Any
-from app.agents.base_agent import BaseReviewAgent
+import os
+from typing import Any, List, Optional
+from app.agents.base_agent import SpecializedReviewAgent, cacheable_system_message
+from app.agents._chunking import has_added_lines
 from app.models.diff_models import DiffResult
 from langchain_core.messages import HumanMessage, SystemMessage
 
 
-class SecurityAgent(BaseReviewAgent):
-    """
-    Agent specialized in reviewing code for security vulnerabilities and best practices.
-    
-    Detection rules:
-    - SQL injection risk
-    - Command injection
-    - Unsafe eval/exec
-    - Sensitive data exposure
-    - Hardcoded credentials
-    """
-    
-    def __init__(self, llm_provider: str = "openai", model_name: str = None, api_key: str = None):
-        super().__init__(
-            name="Security Review Agent",
-            description="Identifies security vulnerabilities, injection risks, authentication "
-                       "issues, authorization problems, and other security-related concerns "
-                       "in code changes.",
-            llm_provider=llm_provider,
-            model_name=model_name,
-            api_key=api_key
-        )
-    
-    def _format_diff_for_llm(self, diff_model: DiffResult) -> str:
-        """
-        Format the diff model into a readable string for the LLM.
-        
-        Args:
-            diff_model: Parsed diff result
-            
-        Returns:
-            Formatted string representation of the diff
-        """
-        formatted_lines = []
-        
-        for file_change in diff_model.files:
-            formatted_lines.append(f"\n=== File: {file_change.filename} ===\n")
-            
-            # Group changes by context to show code blocks
-            for change in file_change.changes:
-                prefix = {
-                    "added": "+",
-                    "removed": "-",
-                    "context": " "
-                }.get(change.type, " ")
-                
-                line_display = f"{prefix} {change.line_number:4d} | {change.content}"
-                formatted_lines.append(line_display)
-        
-        return "\n".join(formatted_lines)
-    
-    def _create_review_prompt(self, diff_text: str) -> List:
-        """
-        Create the prompt for the LLM to review the code changes for security issues.
-        
-        Args:
-            diff_text: Formatted diff string
-            
-        Returns:
-            List of messages for the LLM
-        """
-        system_prompt = """You are an expert security code reviewer specializing in identifying security vulnerabilities.
+# Extensions of files that clearly are not code. Configuration files are
+# still reviewed, since they are a common place for hardcoded credentials.
+_NON_CODE_EXTENSIONS = frozenset({
+    ".md", ".rst", ".txt", ".lock", ".csv", ".svg",
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".pdf",
+})
+
+_SYSTEM_PROMPT = """You are an expert security code reviewer specializing in identifying security vulnerabilities.
 
 Your task is to review code changes and identify security vulnerabilities, specifically:
 1. SQL injection risk - User input directly concatenated into SQL queries without parameterization
@@ -104,126 +51,75 @@ Example output format:
 
 Be thorough and focus only on security vulnerabilities. Prioritize critical security issues over minor concerns."""
 
-        human_prompt = f"""Please review the following code changes for security vulnerabilities:
-
-{diff_text}
+_SYSTEM_MESSAGE = SystemMessage(content=_SYSTEM_PROMPT)
+_CACHEABLE_SYSTEM_MESSAGE = cacheable_system_message(_SYSTEM_PROMPT)
 
-Return a JSON array of all security vulnerabilities found. If no vulnerabilities are found, return an empty array []."""
 
-        return [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt)
-        ]
+class SecurityAgent(SpecializedReviewAgent):
+    """
+    Agent specialized in reviewing code for security vulnerabilities and best practices.
     
-    def _parse_llm_response(self, response: str) -> List[Dict[str, Any]]:
+    Detection rules:
+    - SQL injection risk
+    - Command injection
+    - Unsafe eval/exec
+    - Sensitive data exposure
+    - Hardcoded credentials
+    """
+    
+    review_aspect = "security"
+    
+    def __init__(self, llm_provider: str = "openai", model_name: str = None, api_key: str = None,
+                 latency_budget_ms: int = None, llm_client: Any = None):
+        super().__init__(
+            name="Security Review Agent",
+            description="Identifies security vulnerabilities, injection risks, authentication "
+                       "issues, authorization problems, and other security-related concerns "
+                       "in code changes.",
+            llm_provider=llm_provider,
+            model_name=model_name,
+            api_key=api_key,
+            latency_budget_ms=latency_budget_ms,
+            llm_client=llm_client
+        )
+    
+    def _select_files(self, diff_model: DiffResult) -> Optional[DiffResult]:
         """
-        Parse the LLM response and extract the JSON array of vulnerabilities.
+        Drop documentation, lockfiles and other non-code files from the diff.
         
         Args:
-            response: LLM response string
-            
+            diff_model: Parsed diff result
+        
         Returns:
-            List of vulnerability dictionaries
+            The diff without non-code files, or None if no code was added
         """
-        try:
-            # Try to extract JSON from the response
-            # LLM might wrap JSON in markdown code blocks or add extra text
-            response = response.strip()
-            
-            # Remove markdown code blocks if present
-            if response.startswith("```json"):
-                # Remove ```json from start
-                response = response[7:].lstrip()
-            elif response.startswith("```"):
-                # Remove ``` from start
-                response = response[3:].lstrip()
-            
-            # Remove ``` from end (handle both ```json and ```)
-            if response.endswith("```"):
-                response = response[:-3].rstrip()
-            
-            response = response.strip()
-            
-            # Parse JSON
-            vulnerabilities = json.loads(response)
-            
-            # Validate structure
-            if not isinstance(vulnerabilities, list):
-                return []
-            
-            # Validate each vulnerability has required fields
-            validated_vulnerabilities = []
-            for vuln in vulnerabilities:
-                if isinstance(vuln, dict) and all(
-                    key in vuln for key in ["file", "line", "issue_type", "description", "suggestion"]
-                ):
-                    validated_vulnerabilities.append({
-                        "file": str(vuln["file"]),
-                        "line": int(vuln["line"]),
-                        "issue_type": str(vuln["issue_type"]),
-                        "description": str(vuln["description"]),
-                        "suggestion": str(vuln["suggestion"])
-                    })
-            
-            return validated_vulnerabilities
-            
-        except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
-            # Log parsing errors for debugging
-            print(f"[ERROR {self.name}] Failed to parse LLM response: {str(e)}")
-            print(f"[ERROR {self.name}] Response was: {response[:500] if len(response) > 500 else response}")
-            return []
+        files = [
+            file_change for file_change in diff_model.files
+            if os.path.splitext(file_change.filename)[1].lower() not in _NON_CODE_EXTENSIONS
+        ]
+        if len(files) == len(diff_model.files):
+            return diff_model
+        code_diff = DiffResult(files=files)
+        return code_diff if has_added_lines(code_diff) else None
     
-    def analyze(self, diff_model: DiffResult) -> List[Dict[str, Any]]:
+    def _create_review_prompt(self, diff_text: str) -> List:
         """
-        Analyze diff for security vulnerabilities.
+        Create the prompt for the LLM to review the code changes for security issues.
         
         Args:
-            diff_model: Parsed diff result
+            diff_text: Formatted diff string
             
         Returns:
-            List of vulnerability dictionaries with structure:
-            [
-              {
-                "file": "...",
-                "line": 21,
-                "issue_type": "sql_injection",
-                "description": "...",
-                "suggestion": "..."
-              }
-            ]
+            List of messages for the LLM
         """
-        # If no files changed, return empty list
-        if not diff_model.files:
-            return []
-        
-        # Format diff for LLM
-        diff_text = self._format_diff_for_llm(diff_model)
-        
-        # Create prompt
-        messages = self._create_review_prompt(diff_text)
-        
-        # Call LLM
-        try:
-            response = self.llm_client.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            # Debug: Print raw response (can be removed in production)
-            print(f"[DEBUG {self.name}] Raw LLM response length: {len(response_text)}")
-            print(f"[DEBUG {self.name}] First 200 chars: {response_text[:200]}")
-            
-            # Parse response
-            vulnerabilities = self._parse_llm_response(response_text)
-            
-            print(f"[DEBUG {self.name}] Parsed {len(vulnerabilities)} vulnerabilities")
-            
-            return vulnerabilities
-            
-        except Exception as e:
-            # Log the error for debugging
-            print(f"[ERROR {self.name}] LLM call failed: {str(e)}")
-            print(f"[ERROR {self.name}] Exception type: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            # Return empty list on failure
-            return []
+        human_prompt = f"""Please review the following code changes for security vulnerabilities:
+
+{diff_text}
+
+Return a JSON array of all security vulnerabilities found. If no vulnerabilities are found, return an empty array []."""
 
+        return [
+            self._select_system_message(_SYSTEM_MESSAGE, _CACHEABLE_SYSTEM_MESSAGE),
+            HumanMessage(content=human_prompt)
+        ]
+    
\ No newline at end of file
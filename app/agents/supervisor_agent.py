@@ -1,10 +1,65 @@
-from typing import List, Dict, Any
-from app.agents.base_agent import BaseReviewAgent
-from app.models.diff_models import DiffResult
+import asyncio
+import os
+from collections import defaultdict
+from typing import List, Dict, Any, AsyncIterator, Tuple
+from app.agents.base_agent import BaseReviewAgent, SpecializedReviewAgent, limit_review_requests
+from app.models.diff_models import DiffResult, FileChange
 from app.agents.logic_agent import LogicAgent
 from app.agents.security_agent import SecurityAgent
 from app.agents.performance_agent import PerformanceAgent
 from app.agents.readability_agent import ReadabilityAgent
+from app.agents.fused_review import FusedReviewer
+
+
+def _dedupe_files(diff_model: DiffResult) -> Tuple[DiffResult, Dict[str, List[str]]]:
+    """
+    Keep one file of each group of files with identical changes.
+    
+    PRs often make the same change to many files (a license header, an
+    import reordering). Files match only if every change, including its
+    line number and context, is the same, so issues found in the kept file
+    apply unchanged to its duplicates. They must also share an extension,
+    since agents choose which files to review by extension.
+    
+    Args:
+        diff_model: Parsed diff result
+    
+    Returns:
+        The diff to review (`diff_model` itself if there are no duplicates)
+        and a mapping from each kept filename to the filenames it stands for
+    """
+    kept: Dict[tuple, FileChange] = {}
+    duplicates: Dict[str, List[str]] = {}
+    for file_change in diff_model.files:
+        key = (os.path.splitext(file_change.filename)[1].lower(), tuple(file_change.changes))
+        representative = kept.get(key)
+        if representative is None:
+            kept[key] = file_change
+        else:
+            duplicates.setdefault(representative.filename, []).append(file_change.filename)
+    
+    if not duplicates:
+        return diff_model, duplicates
+    return DiffResult(files=list(kept.values())), duplicates
+
+
+def _fan_out(issues: List[Dict[str, Any]], duplicates: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Copy each issue in a deduplicated file to the files it stands for.
+    
+    Args:
+        issues: Issue dicts of one agent
+        duplicates: Mapping from `_dedupe_files`
+    
+    Returns:
+        Issues with a copy per duplicate file following each original
+    """
+    fanned_out = []
+    for issue in issues:
+        fanned_out.append(issue)
+        for filename in duplicates.get(issue.get("file"), ()):
+            fanned_out.append({**issue, "file": filename})
+    return fanned_out
 
 
 class SupervisorAgent(BaseReviewAgent):
@@ -12,13 +67,27 @@ class SupervisorAgent(BaseReviewAgent):
     Supervisor agent that coordinates and aggregates reviews from specialized agents.
     
     Responsibilities:
-    - Run all agents in parallel/sequence
+    - Run all agents concurrently
     - Collect output from all agents
     - Merge duplicate issues
     - Format final review response
     """
     
-    def __init__(self, llm_provider: str = "openai", model_name: str = None, api_key: str = None):
+    def __init__(self, llm_provider: str = "openai", model_name: str = None, api_key: str = None,
+                 fused_review: bool = False, latency_budget_ms: int = None):
+        """
+        Initialize the supervisor and its specialized agents.
+        
+        Args:
+            llm_provider: LLM provider to use ("openai" or "anthropic")
+            model_name: Specific model name (e.g., "gpt-4", "claude-3-opus")
+            api_key: API key for the LLM provider (if None, uses environment variable)
+            fused_review: If True, review all aspects in one LLM call per diff
+                and give each agent its slice, instead of one call per agent
+            latency_budget_ms: How long the review may take. Budgets of 10s or more
+                let every agent use the provider batch API at half the cost
+                (if None, calls are always made directly)
+        """
         super().__init__(
             name="Supervisor Agent",
             description="Coordinates multiple specialized review agents, aggregates their findings, "
@@ -28,34 +97,83 @@ class SupervisorAgent(BaseReviewAgent):
             api_key=api_key
         )
         
-        # Initialize specialized agents
-        self.sub_agents: List[BaseReviewAgent] = [
-            LogicAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key),
-            SecurityAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key),
-            PerformanceAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key),
-            ReadabilityAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key),
+        # Initialize specialized agents, all sharing the supervisor's client
+        # (and so its HTTP connection pool)
+        llm_client = self.llm_client
+        self.sub_agents: List[SpecializedReviewAgent] = [
+            LogicAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key,
+                       latency_budget_ms=latency_budget_ms, llm_client=llm_client),
+            SecurityAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key,
+                          latency_budget_ms=latency_budget_ms, llm_client=llm_client),
+            PerformanceAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key,
+                             latency_budget_ms=latency_budget_ms, llm_client=llm_client),
+            ReadabilityAgent(llm_provider=llm_provider, model_name=model_name, api_key=api_key,
+                             latency_budget_ms=latency_budget_ms, llm_client=llm_client),
         ]
+        
+        if fused_review:
+            fused_reviewer = FusedReviewer(self.llm_client)
+            for agent in self.sub_agents:
+                agent.fused_reviewer = fused_reviewer
     
-    def _run_all_agents(self, diff_model: DiffResult) -> Dict[str, List[Dict[str, Any]]]:
+    async def _run_agent(self, agent: SpecializedReviewAgent, diff_model: DiffResult) -> List[Dict[str, Any]]:
         """
-        Run all specialized agents and collect their outputs.
+        Run one agent and convert its issues for the response.
+        
+        Args:
+            agent: Specialized agent to run
+            diff_model: Parsed diff result
+        
+        Returns:
+            Issue dicts with source agent information
+        """
+        issues = await agent.aanalyze(diff_model)
+        return [issue.to_dict(source_agent=agent.name) for issue in issues]
+    
+    def _start_agents(self, diff_model: DiffResult) -> List[asyncio.Task]:
+        """
+        Start one task per specialized agent, in `sub_agents` order.
+        
+        The tasks are created inside `limit_review_requests`, so they keep
+        sharing one pool of request slots after this returns.
+        
+        Args:
+            diff_model: Parsed diff result
+        
+        Returns:
+            Running tasks, each resolving to the issue dicts of its agent
+        """
+        with limit_review_requests():
+            return [asyncio.ensure_future(self._run_agent(agent, diff_model)) for agent in self.sub_agents]
+    
+    async def _run_all_agents(self, diff_model: DiffResult) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run all specialized agents concurrently and collect their outputs.
+        
+        The agents are independent and spend nearly all their time waiting on
+        the LLM, so they are dispatched together with `asyncio.gather`. Total
+        latency is roughly that of the slowest agent instead of the sum.
+        
+        All (agent, chunk) requests of the review share one pool of request
+        slots, so a large diff split into many chunks is reviewed with a
+        bounded number of concurrent LLM calls across all agents.
         
         Args:
             diff_model: Parsed diff result
             
         Returns:
-            Dictionary mapping agent names to their issue lists
+            Dictionary mapping agent names to their issue dict lists
         """
+        results = await asyncio.gather(*self._start_agents(diff_model), return_exceptions=True)
+        
         agent_results = {}
         
-        for agent in self.sub_agents:
-            try:
-                issues = agent.analyze(diff_model)
-                agent_results[agent.name] = issues
-            except Exception as e:
-                # If an agent fails, log the error and continue with other agents
-                # In production, you might want to log this error
+        for agent, issues in zip(self.sub_agents, results):
+            if isinstance(issues, BaseException):
+                # If an agent fails, keep the results of the other agents
                 agent_results[agent.name] = []
+            else:
+                agent_results[agent.name] = issues
         
         return agent_results
     
@@ -63,6 +181,10 @@ class SupervisorAgent(BaseReviewAgent):
         """
         Merge duplicate or very similar issues from different agents.
         
+        Issues repeating an earlier (file, line, issue_type) are dropped, so
+        the first agent's wording is kept. Different issue types reported at
+        the same location are merged into one issue.
+        
         Args:
             all_issues: List of all issues from all agents
             
@@ -72,34 +194,32 @@ class SupervisorAgent(BaseReviewAgent):
         if not all_issues:
             return []
         
-        # Group issues by file and line number
-        issues_by_location: Dict[tuple, List[Dict[str, Any]]] = {}
+        # Group issues by file and line number (in first-seen order),
+        # skipping exact repeats
+        issues_by_location: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        seen = set()
         
         for issue in all_issues:
             location_key = (issue.get("file", ""), issue.get("line", 0))
+            issue_key = (*location_key, issue.get("issue_type", ""))
+            if issue_key not in seen:
+                seen.add(issue_key)
+                issues_by_location[location_key].append(issue)
             
-            if location_key not in issues_by_location:
-                issues_by_location[location_key] = []
-            
-            issues_by_location[location_key].append(issue)
-        
-        merged_issues = []
-        
-        for location, issues_at_location in issues_by_location.items():
-            if len(issues_at_location) == 1:
-                # Single issue at this location, no merging needed
-                merged_issues.append(issues_at_location[0])
-            else:
-                # Multiple issues at the same location, merge them
-                merged_issue = self._merge_issues_at_location(issues_at_location)
-                merged_issues.append(merged_issue)
-        
-        return merged_issues
+        # A single issue at a location needs no merging
+        return [
+            issues_at_location[0] if len(issues_at_location) == 1
+            else self._merge_issues_at_location(issues_at_location)
+            for issues_at_location in issues_by_location.values()
+        ]
     
     def _merge_issues_at_location(self, issues: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Merge multiple issues at the same file/line location.
         
+        Repeats of an issue type are dropped before merging, so the issues
+        always have different types.
+        
         Args:
             issues: List of issues at the same location
             
@@ -110,28 +230,22 @@ class SupervisorAgent(BaseReviewAgent):
             return {}
         
         # Use the first issue as the base
-        merged = issues[0].copy()
-        
-        # Collect all issue types and descriptions
-        issue_types = [issue.get("issue_type", "") for issue in issues]
-        descriptions = [issue.get("description", "") for issue in issues]
-        suggestions = [issue.get("suggestion", "") for issue in issues]
-        
-        # If all issues are the same type, keep it; otherwise combine
-        if len(set(issue_types)) == 1:
-            merged["issue_type"] = issue_types[0]
-        else:
-            merged["issue_type"] = "multiple_issues"
+        first = issues[0]
+        merged = first.copy()
         
+        merged["issue_type"] = "multiple_issues"
+            
+        # Collect the distinct descriptions and suggestions in first-seen order
+        unique_descriptions = list(dict.fromkeys(issue.get("description", "") for issue in issues))
+        unique_suggestions = list(dict.fromkeys(issue.get("suggestion", "") for issue in issues))
+            
         # Combine descriptions if they're different
-        unique_descriptions = list(set(descriptions))
         if len(unique_descriptions) == 1:
             merged["description"] = unique_descriptions[0]
         else:
             merged["description"] = "Multiple issues detected: " + "; ".join(unique_descriptions[:3])
-        
+            
         # Combine suggestions
-        unique_suggestions = list(set(suggestions))
         if len(unique_suggestions) == 1:
             merged["suggestion"] = unique_suggestions[0]
         else:
@@ -163,21 +277,12 @@ class SupervisorAgent(BaseReviewAgent):
         total_issues = sum(total_issues_by_agent.values())
         unique_issues = len(merged_issues)
         
-        # Group issues by file
-        issues_by_file: Dict[str, List[Dict[str, Any]]] = {}
-        for issue in merged_issues:
-            filename = issue.get("file", "unknown")
-            if filename not in issues_by_file:
-                issues_by_file[filename] = []
-            issues_by_file[filename].append(issue)
-        
-        # Group issues by type
-        issues_by_type: Dict[str, List[Dict[str, Any]]] = {}
+        # Group issues by file and by type in a single pass
+        issues_by_file: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        issues_by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         for issue in merged_issues:
-            issue_type = issue.get("issue_type", "unknown")
-            if issue_type not in issues_by_type:
-                issues_by_type[issue_type] = []
-            issues_by_type[issue_type].append(issue)
+            issues_by_file[issue.get("file", "unknown")].append(issue)
+            issues_by_type[issue.get("issue_type", "unknown")].append(issue)
         
         return {
             "summary": {
@@ -187,12 +292,12 @@ class SupervisorAgent(BaseReviewAgent):
                 "files_affected": len(issues_by_file),
                 "issue_types": len(issues_by_type)
             },
-            "issues_by_file": issues_by_file,
-            "issues_by_type": issues_by_type,
+            "issues_by_file": dict(issues_by_file),
+            "issues_by_type": dict(issues_by_type),
             "all_issues": merged_issues,
             "agent_results": {
                 agent_name: {
-                    "issues_count": len(issues),
+                    "issues_count": total_issues_by_agent[agent_name],
                     "issues": issues
                 }
                 for agent_name, issues in agent_results.items()
@@ -204,7 +309,7 @@ class SupervisorAgent(BaseReviewAgent):
         Coordinate review across all specialized agents and aggregate results.
         
         Steps:
-        1. Run all agents in sequence
+        1. Run all agents concurrently
         2. Collect output from all agents
         3. Merge duplicate issues
         4. Format final review response
@@ -220,15 +325,84 @@ class SupervisorAgent(BaseReviewAgent):
             - all_issues: All merged unique issues
             - agent_results: Raw results from each agent
         """
-        # Step 1: Run all agents and collect output
-        agent_results = self._run_all_agents(diff_model)
+        return asyncio.run(self.aanalyze(diff_model))
+    
+    async def aanalyze(self, diff_model: DiffResult) -> Dict[str, Any]:
+        """
+        Asynchronously coordinate review across all specialized agents.
         
-        # Step 2: Collect all issues from all agents
+        Args:
+            diff_model: Parsed diff result
+            
+        Returns:
+            Dictionary with aggregated review results (same structure as `analyze`)
+        """
+        # Step 1: Run all agents on one copy of each repeated file change,
+        # then report their issues for every copy
+        review_model, duplicates = _dedupe_files(diff_model)
+        agent_results = await self._run_all_agents(review_model)
+        if duplicates:
+            for agent_name, issues in agent_results.items():
+                agent_results[agent_name] = _fan_out(issues, duplicates)
+        
+        return self._build_review(agent_results)
+    
+    async def aanalyze_stream(self, diff_model: DiffResult) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Review the diff, yielding each agent's issues as soon as that agent finishes.
+        
+        Callers see the fastest agent's findings without waiting for the
+        slowest one. If the consumer stops early, the agents still running
+        are cancelled.
+        
+        Args:
+            diff_model: Parsed diff result
+        
+        Yields:
+            {"agent": name, "issues": [...]} once per agent, in completion
+            order, then {"review": ...} with the same structure as `aanalyze`
+        """
+        review_model, duplicates = _dedupe_files(diff_model)
+        tasks = self._start_agents(review_model)
+        agents = dict(zip(tasks, self.sub_agents))
+        # Filled in completion order but keyed in agent order, as in aanalyze
+        agent_results: Dict[str, List[Dict[str, Any]]] = {agent.name: [] for agent in self.sub_agents}
+        
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in tasks:
+                    if task not in done:
+                        continue
+                    agent = agents[task]
+                    # If an agent fails, keep the results of the other agents
+                    failed = task.cancelled() or task.exception() is not None
+                    issues = [] if failed else task.result()
+                    if duplicates:
+                        issues = _fan_out(issues, duplicates)
+                    agent_results[agent.name] = issues
+                    yield {"agent": agent.name, "issues": issues}
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        yield {"review": self._build_review(agent_results)}
+    
+    def _build_review(self, agent_results: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Merge the agents' issues and format the final review.
+        
+        Args:
+            agent_results: Dictionary mapping agent names to their issue dict lists
+        
+        Returns:
+            Formatted final review response
+        """
+        # Step 2: Collect all issues from all agents (already converted to
+        # dicts with source agent information)
         all_issues = []
-        for agent_name, issues in agent_results.items():
-            # Add source agent information to each issue
-            for issue in issues:
-                issue["source_agent"] = agent_name
+        for issues in agent_results.values():
             all_issues.extend(issues)
         
         # Step 3: Merge duplicate issues
@@ -1,8 +1,16 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from functools import lru_cache
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Optional
 from app.utils.diff_parser import parse_diff
+from app.models.diff_models import DiffResult
 from app.agents.supervisor_agent import SupervisorAgent
+from app.agents._cache import get_default_cache
+from app.agents._diff_cache import CONTEXT_LINES
+import asyncio
+import logging
+import orjson
 import os
 
 # Load environment variables from .env file
@@ -13,6 +21,12 @@ except ImportError:
     # dotenv not installed, skip loading .env file
     pass
 
+# Configure log output here only; the agents just create module loggers.
+# Agent debug output (raw LLM responses) is off unless LOG_LEVEL=DEBUG.
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 
 app = FastAPI(
     title="Auto PR Reviewer",
@@ -21,19 +35,86 @@ app = FastAPI(
 )
 
 
+# Diffs at least this long (in characters) are parsed in a worker thread,
+# so that a multi-megabyte diff does not stall the event loop for other requests
+PARSE_IN_THREAD_CHARS = 256 * 1024
+
+
 class ReviewRequest(BaseModel):
     """Request model for PR review endpoint."""
     diff: str
 
 
+@lru_cache(maxsize=None)
+def _get_supervisor(llm_provider: str, model_name: Optional[str], api_key: Optional[str],
+                    fused_review: bool, latency_budget_ms: Optional[int]) -> SupervisorAgent:
+    """
+    Return the supervisor for a configuration, building it on first use.
+    
+    The supervisor and its agents hold no per-review state, so one instance
+    serves every request with the same settings. A failed construction
+    (e.g. missing credentials) is not cached and is retried next request.
+    """
+    return SupervisorAgent(
+        llm_provider=llm_provider,
+        model_name=model_name,
+        api_key=api_key,
+        fused_review=fused_review,
+        latency_budget_ms=latency_budget_ms
+    )
+
+
+async def _aparse_diff(diff_text: str) -> DiffResult:
+    """
+    Parse a request's diff, off the event loop if it is large.
+    
+    Parsing is pure Python and holds the GIL, so a worker thread does not
+    make it faster; it only lets the event loop serve other requests
+    meanwhile. Small diffs parse in less time than the thread hand-off takes.
+    
+    Args:
+        diff_text: A unified diff patch string
+    
+    Returns:
+        DiffResult with the context the agents are sent
+    """
+    if len(diff_text) < PARSE_IN_THREAD_CHARS:
+        return parse_diff(diff_text, context_window=CONTEXT_LINES)
+    return await asyncio.to_thread(parse_diff, diff_text, context_window=CONTEXT_LINES)
+
+
+def _supervisor_from_env() -> SupervisorAgent:
+    """Return the supervisor for the settings currently in the environment."""
+    # Get LLM provider and API key from environment variables or use defaults
+    llm_provider = os.getenv("LLM_PROVIDER", "openai")
+    model_name = os.getenv("LLM_MODEL_NAME", None)
+    api_key = os.getenv("OPENAI_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
+    fused_review = os.getenv("FUSED_REVIEW", "false").lower() == "true"
+    latency_budget_ms = os.getenv("REVIEW_LATENCY_BUDGET_MS")
+    
+    return _get_supervisor(
+        llm_provider,
+        model_name,
+        api_key,
+        fused_review,
+        int(latency_budget_ms) if latency_budget_ms else None
+    )
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
 
 
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit and miss counts of the shared review cache since startup."""
+    return get_default_cache().stats
+
+
 @app.post("/review-pull-request")
-async def review_pull_request(request: ReviewRequest) -> Dict[str, Any]:
+async def review_pull_request(request: ReviewRequest) -> Response:
     """
     Review a pull request by analyzing the diff.
     
@@ -42,11 +123,14 @@ async def review_pull_request(request: ReviewRequest) -> Dict[str, Any]:
     2. Run supervisor agent (which coordinates all specialized agents)
     3. Return all agent findings
     
+    The review is encoded with orjson and returned as a ready response, so
+    FastAPI does not walk the nested issue lists again to serialize them.
+    
     Args:
         request: ReviewRequest containing the diff text
         
     Returns:
-        Dictionary containing:
+        JSON response with a dictionary containing:
         - summary: Statistics about the review
         - issues_by_file: Issues grouped by file
         - issues_by_type: Issues grouped by type
@@ -54,28 +138,48 @@ async def review_pull_request(request: ReviewRequest) -> Dict[str, Any]:
         - agent_results: Raw results from each agent
     """
     try:
-        # Step 1: Parse diff
-        diff_model = parse_diff(request.diff)
+        # Step 1: Parse diff, keeping only the context the agents are sent
+        diff_model = await _aparse_diff(request.diff)
         
         # Step 2: Run supervisor agent
-        # Get LLM provider and API key from environment variables or use defaults
-        llm_provider = os.getenv("LLM_PROVIDER", "openai")
-        model_name = os.getenv("LLM_MODEL_NAME", None)
-        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
-        
-        supervisor = SupervisorAgent(
-            llm_provider=llm_provider,
-            model_name=model_name,
-            api_key=api_key
-        )
+        supervisor = _supervisor_from_env()
         
         # Step 3: Get all agent findings
-        review_results = supervisor.analyze(diff_model)
+        review_results = await supervisor.aanalyze(diff_model)
         
-        return review_results
+        return Response(orjson.dumps(review_results), media_type="application/json")
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid diff format: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing review: {str(e)}")
 
+
+@app.post("/review-pull-request/stream")
+async def review_pull_request_stream(request: ReviewRequest) -> StreamingResponse:
+    """
+    Review a pull request, streaming each agent's findings as it finishes.
+    
+    The response is newline-delimited JSON: one {"agent": ..., "issues": [...]}
+    line per agent in completion order, then a {"review": ...} line with the
+    same structure as the /review-pull-request response.
+    
+    Args:
+        request: ReviewRequest containing the diff text
+    
+    Returns:
+        StreamingResponse of application/x-ndjson lines
+    """
+    try:
+        diff_model = await _aparse_diff(request.diff)
+        supervisor = _supervisor_from_env()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid diff format: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing review: {str(e)}")
+    
+    async def review_lines():
+        async for event in supervisor.aanalyze_stream(diff_model):
+            yield orjson.dumps(event) + b"\n"
+    
+    return StreamingResponse(review_lines(), media_type="application/x-ndjson")
@@ -1,4 +1,5 @@
 from .diff_models import Change, FileChange, DiffResult
+from .issue import Issue, IssueSchema, IssueListSchema
 
-__all__ = ["Change", "FileChange", "DiffResult"]
+__all__ = ["Change", "FileChange", "DiffResult", "Issue", "IssueSchema", "IssueListSchema"]
 
@@ -1,21 +1,39 @@
-from pydantic import BaseModel
-from typing import List, Literal
+from dataclasses import dataclass
+from typing import List, Literal, NamedTuple
 
 
-class Change(BaseModel):
-    """Represents a single line change in a diff."""
+class Change(NamedTuple):
+    """
+    Represents a single line change in a diff.
+    
+    A diff has one Change per line, so it is a named tuple: cheaper to build
+    than a dataclass (frozen dataclasses assign each field through
+    object.__setattr__) while keeping attribute access for the agents.
+    """
     line_number: int
     type: Literal["added", "removed", "context"]
     content: str
 
 
-class FileChange(BaseModel):
+@dataclass(slots=True, frozen=True)
+class FileChange:
     """Represents changes to a single file."""
     filename: str
     changes: List[Change]
 
 
-class DiffResult(BaseModel):
-    """Structured result of parsing a unified diff."""
+@dataclass(frozen=True)
+class DiffResult:
+    """
+    Structured result of parsing a unified diff.
+    
+    The diff models are built by the parser and only read by the agents, so
+    they are plain tuples and slotted dataclasses rather than validated
+    Pydantic models.
+    DiffResult declares its slots by hand to add a weakref slot (the agents'
+    per-diff caches drop their entries through weakref.finalize when the diff
+    is collected); dataclass's weakref_slot option needs Python 3.11.
+    """
+    __slots__ = ("files", "__weakref__")
+    
     files: List[FileChange]
-
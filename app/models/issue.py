@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+
+
+class IssueSchema(BaseModel):
+    """A single review finding, as requested from the LLM via structured output."""
+    file: str = Field(description="Path of the file the issue is in")
+    line: int = Field(description="Line number where the issue occurs")
+    issue_type: str = Field(description="Short snake_case issue category, e.g. 'logic_error'")
+    description: str = Field(description="Clear description of the problem")
+    suggestion: str = Field(description="Concrete suggestion for how to fix it")
+
+
+class IssueListSchema(BaseModel):
+    """Structured output of a single-aspect review."""
+    issues: List[IssueSchema] = Field(default_factory=list, description="Issues found; empty if none")
+
+
+@dataclass(slots=True, frozen=True)
+class Issue:
+    """
+    A review finding as passed between agents.
+    
+    Slots keep each issue far smaller than the equivalent dict, and frozen
+    instances can be shared between the cache and callers without copying.
+    The supervisor turns issues into dicts with `to_dict` for the API response.
+    """
+    file: str
+    line: int
+    issue_type: str
+    description: str
+    suggestion: str
+    
+    def to_dict(self, **extra: Any) -> Dict[str, Any]:
+        """
+        Convert the issue to a JSON-ready dictionary.
+        
+        Args:
+            **extra: Additional keys to include (e.g. source_agent)
+        
+        Returns:
+            Dictionary with the issue fields and any extra keys
+        """
+        return {
+            "file": self.file,
+            "line": self.line,
+            "issue_type": self.issue_type,
+            "description": self.description,
+            "suggestion": self.suggestion,
+            **extra
+        }
@@ -1,168 +1,165 @@
 import re
-from typing import List
+from collections import deque
+from typing import Iterator, List, Optional
 from app.models.diff_models import Change, FileChange, DiffResult
 
 
-def parse_diff(diff_text: str) -> DiffResult:
+# Hunk header: @@ -old_start,old_count +new_start,new_count @@
+_HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+# File header: diff --git a/path b/path
+_DIFF_GIT_RE = re.compile(r'diff --git a/(.+?)\s+b/(.+)')
+
+
+def parse_diff(diff_text: str, context_window: Optional[int] = None) -> DiffResult:
     """
     Parse a unified diff string and extract structured information.
     
     Args:
         diff_text: A unified diff patch string
+        context_window: Context lines to keep before and after each added or
+            removed line of a file (if None, all context lines are kept; 0
+            drops them all)
         
     Returns:
         DiffResult containing parsed file changes with hunks, added/removed lines,
         and surrounding context
     """
-    files: List[FileChange] = []
-    
-    # Split diff into file sections
-    # Unified diff format: starts with "diff --git" or "--- a/file" or "+++ b/file"
-    file_sections = _split_into_file_sections(diff_text)
-    
-    for section in file_sections:
-        if not section.strip():
-            continue
-            
-        filename = _extract_filename(section)
-        if not filename:
-            continue
-            
-        changes = _parse_file_changes(section)
-        # Include file even if there are no changes (empty changes list)
-        files.append(FileChange(filename=filename, changes=changes))
+    # Unified diff format: files start with "diff --git", or with "--- a/file"
+    # in simpler diffs that have no git headers
+    if diff_text.startswith('diff --git') or '\ndiff --git' in diff_text:
+        file_marker = 'diff --git'
+    else:
+        file_marker = '--- a/'
     
-    return DiffResult(files=files)
+    return DiffResult(files=list(_iter_file_changes(diff_text.split('\n'), file_marker, context_window)))
 
 
-def _split_into_file_sections(diff_text: str) -> List[str]:
-    """Split diff text into sections for each file."""
-    # Pattern to match the start of a new file section (diff --git)
-    # We use "diff --git" as the primary marker for new files
-    file_start_pattern = r'^diff --git'
-    
-    sections = []
-    current_section = []
-    lines = diff_text.split('\n')
-    
-    for line in lines:
-        if re.match(file_start_pattern, line):
-            if current_section:
-                sections.append('\n'.join(current_section))
-            current_section = [line]
-        else:
-            current_section.append(line)
-    
-    if current_section:
-        sections.append('\n'.join(current_section))
+def _iter_file_changes(lines: List[str], file_marker: str,
+                       context_window: Optional[int] = None) -> Iterator[FileChange]:
+    """
+    Parse diff lines in one pass, yielding each file as soon as it ends.
     
-    # If no "diff --git" found, try splitting by "--- a/" (fallback for simpler diffs)
-    if not sections or (len(sections) == 1 and not re.match(file_start_pattern, sections[0].split('\n')[0])):
-        sections = []
-        current_section = []
-        for line in lines:
-            if line.startswith('--- a/'):
-                if current_section:
-                    sections.append('\n'.join(current_section))
-                current_section = [line]
-            else:
-                current_section.append(line)
-        if current_section:
-            sections.append('\n'.join(current_section))
+    A line starting with `file_marker` closes the current file and opens the
+    next one; lines before the first marker form a file of their own. Files
+    without a recognizable filename are dropped.
     
-    return sections if sections else [diff_text]
-
-
-def _extract_filename(section: str) -> str:
-    """Extract filename from a diff section."""
-    lines = section.split('\n')
+    With a `context_window`, context lines are held in a buffer of that size
+    and only kept once an added or removed line follows, or while fewer
+    than `context_window` lines have passed since the last one. Long runs
+    of unchanged lines are never stored.
     
-    # Try to extract from "--- a/path" or "+++ b/path"
-    for line in lines:
-        if line.startswith('--- a/'):
-            # Remove "--- a/" prefix and any trailing whitespace
-            filename = line[6:].strip()
-            # Handle case where filename might have tab or additional info
-            filename = filename.split('\t')[0]
-            return filename
-        elif line.startswith('+++ b/'):
-            filename = line[6:].strip()
-            filename = filename.split('\t')[0]
-            return filename
-        elif line.startswith('diff --git'):
-            # Format: "diff --git a/path b/path"
-            match = re.search(r'diff --git a/(.+?)\s+b/(.+)', line)
-            if match:
-                return match.group(2).strip()
+    Args:
+        lines: Lines of the diff
+        file_marker: Prefix of the line that starts a new file
+        context_window: Context lines to keep around each change (None keeps all)
     
-    return ""
-
-
-def _parse_file_changes(section: str) -> List[Change]:
-    """Parse hunks and line changes from a file section."""
+    Yields:
+        FileChange per file, including files without line changes
+    """
+    filename = ""
     changes: List[Change] = []
-    lines = section.split('\n')
     
     # Track current line numbers for old and new files
     old_line_num = 0
     new_line_num = 0
     in_hunk = False
     
+    # Context lines seen since the last change, and how many more context
+    # lines after it are still kept (only used with a context window)
+    keep_all_context = context_window is None
+    recent_context = deque(maxlen=context_window or 0)
+    trailing_context = 0
+    
     for line in lines:
-        # Skip file headers and metadata
-        if line.startswith('---') or line.startswith('+++') or line.startswith('diff'):
+        # Dispatch on the first character, most frequent lines first. Only
+        # lines starting with ' ', '+' or '-' inside a hunk become changes.
+        # Changes are built with positional arguments, which is measurably
+        # faster than keywords.
+        first_char = line[:1]
+        if first_char == ' ':
+            if in_hunk:
+                # Context line (unchanged)
+                if keep_all_context:
+                    changes.append(Change(new_line_num, "context", line[1:]))
+                elif trailing_context:
+                    changes.append(Change(new_line_num, "context", line[1:]))
+                    trailing_context -= 1
+                else:
+                    recent_context.append(Change(new_line_num, "context", line[1:]))
+                old_line_num += 1
+                new_line_num += 1
             continue
-        if line.startswith('index ') or line.startswith('new file') or line.startswith('deleted file'):
+        # "+++ b/file" and "--- a/file" are file headers, not changes
+        if first_char == '+' and not line.startswith('+++'):
+            if in_hunk:
+                # Added line
+                if recent_context:
+                    changes.extend(recent_context)
+                    recent_context.clear()
+                trailing_context = context_window
+                changes.append(Change(new_line_num, "added", line[1:]))
+                new_line_num += 1
             continue
-        if line.startswith('similarity index') or line.startswith('rename'):
+        if first_char == '-' and not line.startswith('---'):
+            if in_hunk:
+                # Removed line
+                if recent_context:
+                    changes.extend(recent_context)
+                    recent_context.clear()
+                trailing_context = context_window
+                changes.append(Change(old_line_num, "removed", line[1:]))
+                old_line_num += 1
             continue
         
-        # Hunk header: @@ -old_start,old_count +new_start,new_count @@
-        hunk_match = re.match(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@', line)
-        if hunk_match:
-            in_hunk = True
-            old_start = int(hunk_match.group(1))
-            old_count = int(hunk_match.group(2)) if hunk_match.group(2) else 0
-            new_start = int(hunk_match.group(3))
-            new_count = int(hunk_match.group(4)) if hunk_match.group(4) else 0
-            
-            # Reset line numbers to hunk start positions
-            old_line_num = old_start
-            new_line_num = new_start
-            continue
+        # The remaining lines are file headers, metadata, hunk headers and
+        # the "\ No newline at end of file" marker. Only these can start a
+        # new file or name it, so the checks for that stay off the hot path.
+        if line.startswith(file_marker):
+            if filename:
+                yield FileChange(filename=filename, changes=changes)
+            filename = ""
+            changes = []
+            old_line_num = 0
+            new_line_num = 0
+            in_hunk = False
+            recent_context.clear()
+            trailing_context = 0
         
-        if not in_hunk:
-            continue
+        if not filename:
+            filename = _extract_filename(line)
         
-        # Parse line changes
-        if line.startswith(' '):
-            # Context line (unchanged)
-            changes.append(Change(
-                line_number=new_line_num,
-                type="context",
-                content=line[1:]  # Remove leading space
-            ))
-            old_line_num += 1
-            new_line_num += 1
-        elif line.startswith('-'):
-            # Removed line
-            changes.append(Change(
-                line_number=old_line_num,
-                type="removed",
-                content=line[1:]  # Remove leading minus
-            ))
-            old_line_num += 1
-        elif line.startswith('+'):
-            # Added line
-            changes.append(Change(
-                line_number=new_line_num,
-                type="added",
-                content=line[1:]  # Remove leading plus
-            ))
-            new_line_num += 1
-        elif line.startswith('\\'):
-            # No newline at end of file marker
-            continue
+        if first_char == '@':
+            # Hunk header: @@ -old_start,old_count +new_start,new_count @@
+            hunk_match = _HUNK_RE.match(line)
+            if hunk_match:
+                in_hunk = True
+                # Reset line numbers to hunk start positions
+                old_line_num = int(hunk_match.group(1))
+                new_line_num = int(hunk_match.group(3))
     
-    return changes
+    # Include file even if there are no changes (empty changes list)
+    if filename:
+        yield FileChange(filename=filename, changes=changes)
+
 
+def _extract_filename(line: str) -> str:
+    """Extract the filename from a file header line ("" for any other line)."""
+    # Try to extract from "--- a/path" or "+++ b/path"
+    if line.startswith('--- a/'):
+        # Remove "--- a/" prefix and any trailing whitespace
+        filename = line[6:].strip()
+        # Handle case where filename might have tab or additional info
+        filename = filename.split('\t')[0]
+        return filename
+    elif line.startswith('+++ b/'):
+        filename = line[6:].strip()
+        filename = filename.split('\t')[0]
+        return filename
+    elif line.startswith('diff --git'):
+        # Format: "diff --git a/path b/path"
+        match = _DIFF_GIT_RE.search(line)
+        if match:
+            return match.group(2).strip()
+    
+    return ""
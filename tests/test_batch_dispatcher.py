@@ -0,0 +1,51 @@
+import asyncio
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.agents.batch_dispatcher import BatchDispatcher
+
+
+class RecordingDispatcher(BatchDispatcher):
+    """Dispatcher whose batch job answers with the user message, recording each batch."""
+    
+    def __init__(self, **kwargs):
+        super().__init__(FakeListChatModel(responses=["direct"]), provider="openai", model="gpt-4", **kwargs)
+        self.batches = []
+    
+    async def _run_openai_batch(self, requests):
+        self.batches.append([custom_id for custom_id, _ in requests])
+        return {custom_id: messages[-1].content for custom_id, messages in requests if messages[-1].content != "fail"}
+
+
+def _messages(text):
+    return [SystemMessage(content="system"), HumanMessage(content=text)]
+
+
+def test_requests_pooled_into_one_batch():
+    """Test that requests within the window share a batch and get their own answers."""
+    dispatcher = RecordingDispatcher(window_ms=10)
+    
+    async def run():
+        return await asyncio.gather(
+            dispatcher.submit(_messages("a")),
+            dispatcher.submit(_messages("b")),
+            dispatcher.submit(_messages("fail")),
+            return_exceptions=True
+        )
+    
+    first, second, failed = asyncio.run(run())
+    assert (first, second) == ("a", "b")
+    assert isinstance(failed, RuntimeError)
+    assert dispatcher.batches == [["0", "1", "2"]]
+
+
+def test_full_queue_flushes_without_waiting():
+    """Test that reaching max_size submits the batch before the window ends."""
+    dispatcher = RecordingDispatcher(window_ms=60_000, max_size=2)
+    
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            dispatcher.submit(_messages("a")),
+            dispatcher.submit(_messages("b"))
+        ), timeout=1)
+    
+    assert asyncio.run(run()) == ["a", "b"]
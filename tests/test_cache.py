@@ -0,0 +1,309 @@
+import asyncio
+from app.agents import _cache, _chunking, _diff_cache
+from app.agents._cache import MemoryBackend, ResponseCache, make_cache_key
+from app.agents.base_agent import limit_review_requests
+from app.agents.logic_agent import LogicAgent
+from app.agents.performance_agent import PerformanceAgent
+from app.agents.security_agent import SecurityAgent
+from app.models.issue import Issue, IssueListSchema
+from app.utils.diff_parser import parse_diff
+
+
+ISSUES = [Issue(
+    file="app.py",
+    line=2,
+    issue_type="logic_error",
+    description="desc",
+    suggestion="fix"
+)]
+
+
+class FakeEmbeddings:
+    """Embeds text as a fixed vector looked up by its first word."""
+    
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = 0
+    
+    async def aembed_query(self, text):
+        self.calls += 1
+        return self.vectors[text.split()[0]]
+
+
+def test_make_cache_key_separates_parts():
+    """Test that part boundaries are part of the key."""
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+    assert make_cache_key("a", "b") == make_cache_key("a", "b")
+
+
+def test_exact_hit_returns_copy():
+    """Test that a returned list can be changed without affecting the cache."""
+    cache = ResponseCache()
+    key = make_cache_key("agent", "diff")
+    
+    assert cache.get(key) is None
+    cache.set(key, ISSUES)
+    
+    hit = cache.get(key)
+    assert hit == ISSUES
+    hit.append(hit[0])
+    assert cache.get(key) == ISSUES
+
+
+def test_persistent_store(tmp_path):
+    """Test that entries survive reopening a shelve-backed cache."""
+    path = str(tmp_path / "cache")
+    ResponseCache(path=path).set("key", ISSUES)
+    
+    assert ResponseCache(path=path).get("key") == ISSUES
+
+
+def test_expired_entries_miss(monkeypatch):
+    """Test that entries older than the TTL are not served."""
+    now = [1000.0]
+    monkeypatch.setattr("app.agents._cache.time.time", lambda: now[0])
+    cache = ResponseCache(ttl_s=60)
+    cache.set("key", ISSUES)
+    
+    now[0] += 59
+    assert cache.get("key") == ISSUES
+    now[0] += 2
+    assert cache.get("key") is None
+
+
+def test_memory_backend_evicts_least_recently_used():
+    """Test that a full memory backend drops the entry used longest ago."""
+    cache = ResponseCache(backend=MemoryBackend(max_entries=2))
+    cache.set("a", ISSUES)
+    cache.set("b", ISSUES)
+    cache.get("a")
+    cache.set("c", ISSUES)
+    
+    assert cache.get("a") == ISSUES
+    assert cache.get("b") is None
+    assert cache.get("c") == ISSUES
+
+
+def test_semantic_hit_within_scope():
+    """Test that near-identical prompts hit and other scopes do not."""
+    embeddings = FakeEmbeddings({
+        "original": [1.0, 0.0],
+        "rebased": [0.99, 0.05],
+        "unrelated": [0.0, 1.0],
+    })
+    cache = ResponseCache(embeddings=embeddings, similarity_threshold=0.97)
+    
+    async def run():
+        assert await cache.aget("k1", "logic", "original diff") is None
+        await cache.aset("k1", "logic", "original diff", ISSUES)
+        
+        assert await cache.aget("k2", "logic", "rebased diff") == ISSUES
+        assert await cache.aget("k3", "logic", "unrelated diff") is None
+        assert await cache.aget("k4", "security", "rebased diff") is None
+    
+    asyncio.run(run())
+    # Each distinct text is embedded once, however often it is looked up
+    assert embeddings.calls == 3
+    assert cache.stats == {"hits": 0, "semantic_hits": 1, "misses": 3}
+
+
+def test_semantic_tier_evicts_least_recently_used():
+    """Test that the semantic tier stays within max_vectors, keeping recently hit entries."""
+    embeddings = FakeEmbeddings({"first": [1.0, 0.0], "second": [0.0, 1.0], "third": [-1.0, 0.0]})
+    cache = ResponseCache(embeddings=embeddings, max_vectors=2)
+
+    async def run():
+        await cache.aset("k1", "logic", "first diff", ISSUES)
+        await cache.aset("k2", "logic", "second diff", ISSUES)
+        # A semantic hit on "first" makes "second" the least recently used
+        assert await cache.aget("k4", "logic", "first again") == ISSUES
+        await cache.aset("k3", "logic", "third diff", ISSUES)
+        return [await cache.aget(f"k{n}", "logic", f"{word} again") for n, word in
+                ((5, "first"), (6, "second"), (7, "third"))]
+
+    assert asyncio.run(run()) == [ISSUES, None, ISSUES]
+    assert len(cache._vectors) == 2
+
+
+def test_concurrent_lookups_share_one_embedding():
+    """Test that agents looking up the same diff at once embed it once."""
+    embeddings = FakeEmbeddings({"diff": [1.0, 0.0]})
+    cache = ResponseCache(embeddings=embeddings)
+    
+    async def run():
+        return await asyncio.gather(*(cache.aget(f"k{n}", f"agent{n}", "diff text") for n in range(4)))
+    
+    assert asyncio.run(run()) == [None] * 4
+    assert embeddings.calls == 1
+
+
+class SlowEmbeddings(FakeEmbeddings):
+    """FakeEmbeddings that answers after a delay."""
+
+    async def aembed_query(self, text):
+        await asyncio.sleep(0.01)
+        return await super().aembed_query(text)
+
+
+def test_cancelled_lookup_does_not_cancel_shared_embedding():
+    """Test that a lookup sharing an embedding survives the lookup that started it being cancelled."""
+    embeddings = SlowEmbeddings({"original": [1.0, 0.0], "rebased": [0.99, 0.05]})
+    cache = ResponseCache(embeddings=embeddings)
+
+    async def run():
+        await cache.aset("k1", "logic", "original diff", ISSUES)
+        owner = asyncio.ensure_future(cache.aget("k2", "logic", "rebased diff"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.aget("k3", "logic", "rebased diff"))
+        await asyncio.sleep(0.005)
+        owner.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == ISSUES
+    assert embeddings.calls == 2
+
+
+def test_texts_longer_than_embedding_limit_skip_semantic_tier():
+    """Test that long diffs sharing a prefix are not served each other's results."""
+    embeddings = FakeEmbeddings({"shared": [1.0, 0.0]})
+    cache = ResponseCache(embeddings=embeddings)
+    prefix = "shared " + "x" * _cache.EMBED_MAX_CHARS
+    
+    async def run():
+        await cache.aset("k1", "logic", prefix + " first tail", ISSUES)
+        return await cache.aget("k2", "logic", prefix + " second tail")
+    
+    assert asyncio.run(run()) is None
+    assert embeddings.calls == 0
+
+
+def test_semantic_tier_prunes_expired_and_survives_embedding_errors(monkeypatch):
+    """Test that expired vectors are dropped and a failing embedding is a miss."""
+    embeddings = FakeEmbeddings({"original": [1.0, 0.0], "rebased": [0.99, 0.05]})
+    cache = ResponseCache(embeddings=embeddings, ttl_s=60)
+    now = [1000.0]
+    monkeypatch.setattr(_cache.time, "time", lambda: now[0])
+    
+    async def run():
+        await cache.aset("k1", "logic", "original diff", ISSUES)
+        now[0] += 120
+        await cache.aset("k2", "logic", "rebased diff", ISSUES)
+        assert len(cache._vectors) == 1
+        
+        assert await cache.aget("k3", "logic", "unknown diff") is None
+    
+    asyncio.run(run())
+
+
+class SlowClient:
+    """Chat model stand-in that answers with an empty issue list after a delay."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    def with_structured_output(self, schema, **kwargs):
+        return self
+    
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return IssueListSchema()
+
+
+def test_concurrent_identical_requests_share_one_call(monkeypatch):
+    """Test that identical prompts in flight at the same time make one LLM call."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    agent = LogicAgent()
+    agent._cache = ResponseCache()
+    agent.llm_client = SlowClient()
+    diff_model = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 2\n")
+    
+    async def run():
+        return await asyncio.gather(agent.aanalyze(diff_model), agent.aanalyze(diff_model))
+    
+    assert asyncio.run(run()) == [[], []]
+    assert agent.llm_client.calls == 1
+
+
+def test_cancelled_caller_does_not_cancel_shared_call(monkeypatch):
+    """Test that a request waiting on another's LLM call survives that request being cancelled."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    agent = LogicAgent()
+    agent._cache = ResponseCache()
+    agent.llm_client = SlowClient()
+    diff_model = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 2\n")
+
+    async def run():
+        owner = asyncio.ensure_future(agent.aanalyze(diff_model))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(agent.aanalyze(diff_model))
+        await asyncio.sleep(0.005)
+        owner.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == []
+    assert agent.llm_client.calls == 1
+
+
+def test_prompt_template_is_built_once_per_agent(monkeypatch):
+    """Test that cache keys reuse the agent's template hash and still differ per diff."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    agent = LogicAgent()
+    built = []
+    create_review_prompt = agent._create_review_prompt
+    monkeypatch.setattr(agent, "_create_review_prompt", lambda text: built.append(text) or create_review_prompt(text))
+    first = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 2\n")
+    second = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 3\n")
+
+    keys = {agent._cache_key(diff_model, _diff_cache.format_diff(diff_model)) for diff_model in (first, second, first)}
+
+    assert len(keys) == 2
+    assert len(built) == 1
+
+
+def test_agents_and_chunks_share_request_slots(monkeypatch):
+    """Test that the chunk requests of all agents in a review share one concurrency limit."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(_chunking, "count_tokens", lambda text, model: len(text))
+    client = SlowClient()
+    agents = [LogicAgent(), PerformanceAgent()]
+    for agent in agents:
+        agent._cache = ResponseCache()
+        agent.llm_client = client
+        agent.max_input_tokens = 100
+    diff_model = parse_diff("".join(
+        f"--- a/m{i}.py\n+++ b/m{i}.py\n@@ -1,1 +1,1 @@\n-x = {i}\n+x = {i + 1}\n"
+        for i in range(6)
+    ))
+    
+    async def run():
+        with limit_review_requests(3):
+            return await asyncio.gather(*(agent.aanalyze(diff_model) for agent in agents))
+    
+    assert asyncio.run(run()) == [[], []]
+    assert client.calls == 12
+    assert client.max_in_flight == 3
+
+
+def test_diffs_without_new_code_skip_the_llm(monkeypatch):
+    """Test that removal-only diffs and, for security, non-code files make no LLM call."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    client = SlowClient()
+    logic, security = LogicAgent(), SecurityAgent()
+    for agent in (logic, security):
+        agent._cache = ResponseCache()
+        agent.llm_client = client
+    removal = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -1,2 +1,1 @@\n x = 1\n-y = 2\n")
+    docs = parse_diff("--- a/README.md\n+++ b/README.md\n@@ -1,1 +1,1 @@\n-old\n+new\n")
+    
+    assert asyncio.run(logic.aanalyze(removal)) == []
+    assert asyncio.run(security.aanalyze(docs)) == []
+    assert client.calls == 0
+    
+    assert asyncio.run(logic.aanalyze(docs)) == []
+    assert client.calls == 1
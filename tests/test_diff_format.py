@@ -0,0 +1,109 @@
+import gc
+import hashlib
+from itertools import chain
+from app.agents import _chunking, _diff_cache
+from app.agents._chunking import chunk_diff
+from app.agents._diff_cache import diff_digest, format_diff
+from app.utils.diff_parser import parse_diff
+
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,3 +1,3 @@
+ def f(x):
+-    return x
++    return x + 1
+ 
+diff --git a/util.py b/util.py
+--- a/util.py
++++ b/util.py
+@@ -10,1 +10,2 @@
+ import os
++import sys
+"""
+
+
+def test_format_diff_output():
+    """Test the text layout sent to the LLM."""
+    text = format_diff(parse_diff(DIFF))
+    
+    assert text == (
+        "\n=== File: app.py ===\n\n"
+        "     1 | def f(x):\n"
+        "-    2 |     return x\n"
+        "+    2 |     return x + 1\n"
+        "     3 | \n"
+        "\n=== File: util.py ===\n\n"
+        "    10 | import os\n"
+        "+   11 | import sys\n"
+    )
+
+
+def test_format_diff_reused_per_diff():
+    """Test that a diff is formatted once and its entry dropped with the diff."""
+    diff_model = parse_diff(DIFF)
+    
+    assert format_diff(diff_model) is format_diff(diff_model)
+    assert id(diff_model) in _diff_cache._FORMAT_CACHE
+    
+    key = id(diff_model)
+    del diff_model
+    gc.collect()
+    assert key not in _diff_cache._FORMAT_CACHE
+
+
+def test_diff_digest_hashed_once_per_diff(monkeypatch):
+    """Test that every agent reuses the digest of a diff's formatted text."""
+    diff_model = parse_diff(DIFF)
+    text = format_diff(diff_model)
+    hashed = []
+    sha256 = hashlib.sha256
+    monkeypatch.setattr(hashlib, "sha256", lambda data: hashed.append(data) or sha256(data))
+    
+    digests = {diff_digest(diff_model, text) for _ in range(4)}
+    
+    assert digests == {sha256(text.encode("utf-8")).hexdigest()}
+    assert len(hashed) == 1
+    assert diff_digest(diff_model, text + "\n") != digests.pop()
+
+
+def test_format_diff_collapses_distant_context():
+    """Test that context further than CONTEXT_LINES from a change is skipped."""
+    context = "".join(f" line {n}\n" for n in range(1, 11))
+    text = format_diff(parse_diff(
+        "--- a/app.py\n+++ b/app.py\n@@ -1,11 +1,11 @@\n" + context + "-x = 1\n+x = 2\n"
+    ))
+    
+    assert text == (
+        "\n=== File: app.py ===\n\n"
+        "       ... 7 lines skipped ...\n"
+        "     8 | line 8\n"
+        "     9 | line 9\n"
+        "    10 | line 10\n"
+        "-   11 | x = 1\n"
+        "+   11 | x = 2\n"
+    )
+
+
+def test_chunk_diff_splits_oversize_diffs(monkeypatch):
+    """Test that only oversize diffs are split, covering every change once in order."""
+    # One token per character keeps the limits independent of tiktoken
+    monkeypatch.setattr(_chunking, "count_tokens", lambda text, model: len(text))
+    diff_model = parse_diff(DIFF)
+    
+    assert chunk_diff(diff_model, "gpt-4", max_tokens=10_000) is None
+    
+    # Over the per-file limit: one chunk per file
+    chunks = chunk_diff(diff_model, "gpt-4", max_tokens=10_000, per_file_tokens=100)
+    assert [chunk.files[0].filename for chunk in chunks] == ["app.py", "util.py"]
+    
+    # Files over the hard limit are sliced as well
+    chunks = chunk_diff(diff_model, "gpt-4", max_tokens=60)
+    assert chunks is chunk_diff(diff_model, "gpt-4", max_tokens=60)
+    assert len(chunks) > 2
+    
+    def lines(model):
+        return [(fc.filename, c.line_number, c.type) for fc in model.files for c in fc.changes]
+    
+    assert list(chain.from_iterable(lines(chunk) for chunk in chunks)) == lines(diff_model)
@@ -120,6 +120,28 @@ def test_parse_multiple_files():
     assert any(c.content == "added in file2" for c in file2_changes)
 
 
+def test_git_diff_splits_only_on_diff_headers():
+    """Test that a git diff is split on "diff --git" lines only, not on "--- a/" lines."""
+    diff_text = """diff --git a/notes.md b/notes.md
+--- a/notes.md
++++ b/notes.md
+@@ -1,2 +1,1 @@
+ title
+--- a/old.md
+diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,1 +1,2 @@
+ line1
++added
+"""
+    result = parse_diff(diff_text)
+    
+    assert [f.filename for f in result.files] == ["notes.md", "app.py"]
+    assert len(result.files[0].changes) == 1
+    assert result.files[1].changes[-1].content == "added"
+
+
 def test_parse_added_and_removed_lines():
     """Test parsing a diff with both added and removed lines."""
     diff_text = """--- a/file.py
@@ -145,6 +167,20 @@ def test_parse_added_and_removed_lines():
     assert added[0].content == "new line"
 
 
+def test_context_window_keeps_only_nearby_context():
+    """Test that a context window drops unchanged lines far from any change."""
+    diff_text = "--- a/file.py\n+++ b/file.py\n@@ -1,10 +1,11 @@\n" + "".join(
+        f" line{n}\n" for n in range(1, 6)
+    ) + "+added\n" + "".join(f" line{n}\n" for n in range(6, 11))
+    
+    windowed = parse_diff(diff_text, context_window=2).files[0].changes
+    
+    assert [c.content for c in windowed] == ["line4", "line5", "added", "line6", "line7"]
+    assert [c.line_number for c in windowed] == [4, 5, 6, 7, 8]
+    assert [c.type for c in parse_diff(diff_text, context_window=0).files[0].changes] == ["added"]
+    assert len(parse_diff(diff_text).files[0].changes) == 11
+
+
 def test_parse_context_lines():
     """Test that context lines are properly identified."""
     diff_text = """--- a/file.py
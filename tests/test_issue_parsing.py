@@ -0,0 +1,80 @@
+import asyncio
+from app.agents.logic_agent import LogicAgent
+from app.agents.security_agent import SecurityAgent
+from app.models.issue import Issue, IssueListSchema, IssueSchema
+
+
+def test_parse_keeps_valid_coerces_loose_and_drops_incomplete(monkeypatch):
+    """Test that issue validation keeps, coerces or drops each issue independently."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    agent = LogicAgent()
+    response = """```json
+[
+  {"file": "a.py", "line": 3, "issue_type": "logic_error", "description": "d", "suggestion": "s"},
+  {"file": "b.py", "line": "7", "issue_type": "logic_error", "description": "d", "suggestion": "s", "extra": 1},
+  {"file": "c.py", "issue_type": "logic_error", "description": "d", "suggestion": "s"},
+  "not an issue"
+]
+```"""
+    
+    issues = agent._parse_llm_response(response)
+    
+    assert [issue.file for issue in issues] == ["a.py", "b.py"]
+    assert issues[1].line == 7
+
+
+def test_parse_keeps_backticks_inside_fields(monkeypatch):
+    """Test that code fences inside a field do not cut the payload, fenced or not."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    agent = SecurityAgent()
+    payload = ('[{"file": "db.py", "line": 9, "issue_type": "resource_leak", "description": "d", '
+               '"suggestion": "Use ```with open(p)```"}]')
+    
+    for response in (payload, f"```json\n{payload}\n```"):
+        issues = agent._parse_llm_response(response)
+    
+        assert [issue.suggestion for issue in issues] == ["Use ```with open(p)```"]
+
+
+def test_issue_is_slotted_and_converted_at_the_boundary():
+    """Test that issues carry no per-instance dict and become plain dicts only on request."""
+    issue = Issue("a.py", 3, "logic_error", "d", "s")
+    
+    assert not hasattr(issue, "__dict__")
+    assert issue.to_dict(source_agent="Logic") == {
+        "file": "a.py",
+        "line": 3,
+        "issue_type": "logic_error",
+        "description": "d",
+        "suggestion": "s",
+        "source_agent": "Logic"
+    }
+
+
+class FlakyStructuredClient:
+    """Structured-output stand-in that returns no tool call the first time."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def with_structured_output(self, schema, **kwargs):
+        return self
+    
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.calls == 1:
+            return None
+        return IssueListSchema(issues=[
+            IssueSchema(file="a.py", line=3, issue_type="logic_error", description="d", suggestion="s")
+        ])
+
+
+def test_structured_output_is_retried_when_malformed(monkeypatch):
+    """Test that a response without a valid tool call is asked for again."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    agent = LogicAgent(llm_client=FlakyStructuredClient())
+    
+    issues = asyncio.run(agent._ainvoke_structured([]))
+    
+    assert issues == [Issue("a.py", 3, "logic_error", "d", "s")]
+    assert agent.llm_client.calls == 2
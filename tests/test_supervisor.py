@@ -0,0 +1,224 @@
+import asyncio
+import pytest
+from app.agents import _chunking, _diff_cache
+from app.agents._cache import ResponseCache
+from app.agents.base_agent import MAX_CHUNK_CONCURRENCY
+from app.agents.fused_review import FusedReviewSchema
+from app.agents.supervisor_agent import SupervisorAgent
+from app.models.issue import IssueListSchema, IssueSchema
+from app.utils.diff_parser import parse_diff
+
+
+def issue(agent, line, issue_type, description):
+    return {
+        "file": "app.py",
+        "line": line,
+        "issue_type": issue_type,
+        "description": description,
+        "suggestion": "fix",
+        "source_agent": agent
+    }
+
+
+@pytest.fixture
+def stub_supervisor(monkeypatch):
+    """Build a SupervisorAgent whose sub-agents call `client` and start with empty caches."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    
+    def build(client):
+        supervisor = SupervisorAgent()
+        for agent in supervisor.sub_agents:
+            agent._cache = ResponseCache()
+            agent.llm_client = client
+        return supervisor
+    
+    return build
+
+
+def test_merge_drops_repeated_issues(monkeypatch):
+    """Test that repeats of (file, line, issue_type) are dropped before merging."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    supervisor = SupervisorAgent()
+    
+    merged = supervisor._merge_duplicate_issues([
+        issue("Logic", 1, "runtime_error", "first"),
+        issue("Security", 1, "runtime_error", "second"),
+        issue("Security", 2, "sql_injection", "query"),
+        issue("Readability", 2, "magic_number", "literal"),
+    ])
+    
+    assert merged[0] == issue("Logic", 1, "runtime_error", "first")
+    assert merged[1]["issue_type"] == "multiple_issues"
+    assert merged[1]["description"] == "Multiple issues detected: query; literal"
+    assert merged[1]["suggestion"] == "fix"
+    assert merged[1]["source_agents"] == ["Security", "Readability"]
+    assert len(merged) == 2
+
+
+class CountingClient:
+    """Chat model stand-in that records how many calls overlap."""
+    
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    def with_structured_output(self, schema, **kwargs):
+        return self
+    
+    async def ainvoke(self, messages):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return IssueListSchema()
+
+
+def test_sub_agents_run_concurrently(stub_supervisor):
+    """Test that all four sub-agents wait on the LLM at the same time."""
+    client = CountingClient()
+    supervisor = stub_supervisor(client)
+    diff_model = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 2\n")
+    
+    review = asyncio.run(supervisor.aanalyze(diff_model))
+    
+    assert review["summary"]["total_issues_found"] == 0
+    assert client.max_in_flight == 4
+
+
+class RecordingClient:
+    """Chat model stand-in that reports one issue in the first file it is shown."""
+    
+    def __init__(self):
+        self.prompts = []
+    
+    def with_structured_output(self, schema, **kwargs):
+        return self
+    
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return IssueListSchema(issues=[
+            IssueSchema(file="a.py", line=1, issue_type="magic_number", description="d", suggestion="s")
+        ])
+
+
+def test_identical_file_changes_are_reviewed_once(stub_supervisor):
+    """Test that repeated file changes are sent once and their issues reported for every copy."""
+    client = RecordingClient()
+    supervisor = stub_supervisor(client)
+    diff_model = parse_diff("".join(
+        f"--- a/{name}\n+++ b/{name}\n@@ -0,0 +1,1 @@\n+LIMIT = 42\n" for name in ("a.py", "b.py")
+    ))
+    
+    review = asyncio.run(supervisor.aanalyze(diff_model))
+    
+    assert all("b.py" not in prompt for prompt in client.prompts)
+    assert sorted(review["issues_by_file"]) == ["a.py", "b.py"]
+
+
+def test_identical_changes_to_non_code_files_are_kept_apart(stub_supervisor):
+    """Test that a code file is not folded into a non-code file with the same change."""
+    client = RecordingClient()
+    supervisor = stub_supervisor(client)
+    diff_model = parse_diff("".join(
+        f"--- a/{name}\n+++ b/{name}\n@@ -0,0 +1,1 @@\n+API_KEY = 'sk-live-123'\n"
+        for name in ("notes.md", "settings.py")
+    ))
+    
+    asyncio.run(supervisor.aanalyze(diff_model))
+    
+    assert len(client.prompts) == len(supervisor.sub_agents)
+    assert all("settings.py" in prompt for prompt in client.prompts)
+
+
+def test_agents_share_one_formatted_diff(monkeypatch, stub_supervisor):
+    """Test that the diff is formatted once per review, not once per agent."""
+    client = RecordingClient()
+    supervisor = stub_supervisor(client)
+    formatted = []
+    render_diff = _diff_cache.render_diff
+    monkeypatch.setattr(_diff_cache, "render_diff", lambda diff: formatted.append(diff) or render_diff(diff))
+    diff_model = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -0,0 +1,1 @@\n+LIMIT = 42\n")
+    
+    asyncio.run(supervisor.aanalyze(diff_model))
+    
+    assert len(client.prompts) == 4
+    assert len(formatted) == 1
+
+
+def test_stream_yields_each_agent_then_the_review(stub_supervisor):
+    """Test that streamed reviews report every agent before the merged review."""
+    client = RecordingClient()
+    supervisor = stub_supervisor(client)
+    diff_model = parse_diff("--- a/a.py\n+++ b/a.py\n@@ -0,0 +1,1 @@\n+LIMIT = 42\n")
+    
+    async def collect():
+        return [event async for event in supervisor.aanalyze_stream(diff_model)]
+    
+    events = asyncio.run(collect())
+    
+    assert sorted(event["agent"] for event in events[:-1]) == sorted(a.name for a in supervisor.sub_agents)
+    assert events[-1]["review"] == asyncio.run(supervisor.aanalyze(diff_model))
+
+
+class FusedCountingClient(CountingClient):
+    """CountingClient answering fused reviews."""
+    
+    async def ainvoke(self, messages):
+        await super().ainvoke(messages)
+        return FusedReviewSchema()
+
+
+def test_fused_chunk_reviews_share_request_slots(monkeypatch):
+    """Test that fused reviews of many chunks stay within the review's request limit."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(_chunking, "count_tokens", lambda text, model: len(text))
+    supervisor = SupervisorAgent(fused_review=True)
+    client = FusedCountingClient()
+    supervisor.sub_agents[0].fused_reviewer._structured_client = client
+    for agent in supervisor.sub_agents:
+        agent.max_input_tokens = 100
+    diff_model = parse_diff("".join(
+        f"--- a/m{i}.py\n+++ b/m{i}.py\n@@ -1,1 +1,1 @@\n-x = {i}\n+x = {i + 1}\n"
+        for i in range(40)
+    ))
+    
+    asyncio.run(supervisor.aanalyze(diff_model))
+    
+    assert client.max_in_flight == MAX_CHUNK_CONCURRENCY
+
+
+class FlakyFusedClient:
+    """Fused-review stand-in that returns no tool call the first time."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.calls == 1:
+            return None
+        return FusedReviewSchema(logic=[
+            IssueSchema(file="app.py", line=1, issue_type="logic_error", description="d", suggestion="s")
+        ])
+
+
+def test_fused_review_is_retried_when_malformed(monkeypatch):
+    """Test that a fused response without a valid tool call is asked for again."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    supervisor = SupervisorAgent(fused_review=True)
+    client = FlakyFusedClient()
+    supervisor.sub_agents[0].fused_reviewer._structured_client = client
+    diff_model = parse_diff("--- a/app.py\n+++ b/app.py\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 2\n")
+    
+    review = asyncio.run(supervisor.aanalyze(diff_model))
+    
+    assert client.calls == 2
+    assert [i["issue_type"] for i in review["all_issues"]] == ["logic_error"]
+
+
+def test_latency_budget_reaches_every_agent(monkeypatch):
+    """Test that a batch-sized latency budget sends every agent through the batch API."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    supervisor = SupervisorAgent(latency_budget_ms=60_000)
+    
+    assert all(agent._uses_batch_api() for agent in supervisor.sub_agents)